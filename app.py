@@ -1,30 +1,45 @@
+from functools import partial
+
 import streamlit as st
-import pandas as pd
-from PIL import Image
 
 # From app_modules/charts.py
 from app_modules.charts import (
     display_combined_chart,
     display_combined_energy_chart,
     create_energy_region_pie_chart,
+    get_combined_chart,
+    get_combined_energy_chart,
 )
 
 # From app_modules/map.py
-from app_modules.map import display_map
+from app_modules.map import display_map, warm_tooltip_properties
 
 # From app_modules/sidebar.py
-from app_modules.sidebar import display_date_filter_sidebar
-
-# From app_modules/filter.py
-from app_modules.filter import (
-    filter_dataframe_by_date,
-    filter_dataframe_by_energy_type,
-    filter_dataframe_by_region,
-    compute_regional_energy_statistics,
-    format_dataframe
+from app_modules.sidebar import (
+    default_date_range,
+    display_date_filter_sidebar,
+    display_timing_panel,
 )
 
-from app_modules.colors import ENERGY_TYPE_EMOJI
+# From app_modules/tables.py
+from app_modules.tables import display_regional_table
+
+# From app_modules/query.py
+from app_modules.query import Selection, regional_statistics
+
+from app_modules.colors import ENERGY_TYPE_EMOJI, ENERGY_TYPES
+
+# From app_modules/dataset.py
+from app_modules.dataset import range_version
+
+# From app_modules/snapshot.py
+from app_modules.snapshot import SnapshotStore
+
+# From app_modules/timing.py
+from app_modules.timing import finish_rerun, span, start_rerun
+
+# From app_modules/warmup.py
+from app_modules.warmup import WarmupPool
 
 # From app_modules/explanation.py
 from app_modules.explanation import (
@@ -33,23 +48,24 @@ from app_modules.explanation import (
     SPECIFIC_ENERGY_TAB_EXPLANATION,
 )
 
-from app_modules.helpers import adjust_selectbox_position
+from app_modules.helpers import adjust_selectbox_position, load_logo
 
 # --------------------------------------------
 # --       ALL ENERGY TYPE DISPLAY          --
 # --------------------------------------------
 
 def display_energy_overview_tab(
-    regions_data, filtered_data, energy_type, start_date, end_date
+    regions_data, rollups, energy_type, start_date, end_date, figure_key
 ):
     """
     Display the Energy Overview tab with the map, combined chart, and regional data table.
 
     :param regions_data: DataFrame containing data grouped by regions.
-    :param filtered_data: DataFrame filtered based on user selection.
+    :param rollups: Rollups of the dataset, which the charts read.
     :param energy_type: String representing the selected energy type.
     :param start_date: Start date selected by the user.
     :param end_date: End date selected by the user.
+    :param figure_key: Date range and its version token, under which figures and tooltips are memoized.
     :param key: Unique key used by Streamlit components.
     """
     col1, col2 = st.columns([0.25, 0.75])
@@ -59,20 +75,19 @@ def display_energy_overview_tab(
         st.write("")
         st.write("")
         # Displaying the map visualization
-        display_map(regions_data, energy_type, start_date, end_date, key=energy_type)
-        filtered_data_by_region = filter_dataframe_by_region(
-            filtered_data, st.session_state["region"]
+        display_map(
+            regions_data, energy_type, start_date, end_date, figure_key, key=energy_type
         )
 
     with col2:
         # Displaying combined chart visualization
-        display_combined_chart(
-            filtered_data_by_region,
+        selection = Selection(
+            start_date,
+            end_date,
             st.session_state["region"],
-            width=1000,
-            height=500,
             time_interval=st.session_state.get("time_interval", "Yearly"),
         )
+        display_combined_chart(rollups, selection, width=1000, height=500, cache_key=figure_key)
         sub_col1, sub_col2, sub_col3 = st.columns([0.4, 0.35, 0.15])
         with sub_col2:
             st.selectbox(
@@ -84,7 +99,8 @@ def display_energy_overview_tab(
 
    
     st.subheader("Region's stats ranked by volume sold:")
-    st.dataframe(format_dataframe(regions_data), height=463, use_container_width=True)
+    with span("regional_table"):
+        display_regional_table(regions_data, height=463)
 
     st.write("---")
     st.markdown(ALL_ENERGY_TAB_EXPLANATION)
@@ -96,35 +112,35 @@ def display_energy_overview_tab(
 
 
 def display_specific_energy_tab(
-    regions_data, filtered_data_by_energy, energy_type, start_date, end_date, key
+    regions_data, rollups, energy_type, start_date, end_date, figure_key, key
 ):
     """
     Displays the tab for specific energy types with relevant visualizations and data.
 
     :param regions_data: DataFrame containing data grouped by regions.
-    :param filtered_data_by_energy: DataFrame filtered by the selected energy type.
+    :param rollups: Rollups of the dataset, which the charts read.
     :param energy_type: String representing the selected energy type.
     :param start_date: Start date selected by the user.
     :param end_date: End date selected by the user.
+    :param figure_key: Date range and its version token, under which figures and tooltips are memoized.
     :param key: Unique key used by Streamlit components.
     """
     col1, col2 = st.columns([0.25, 0.75])
 
     with col1:
         # Displaying map and pie chart visualizations
-        display_map(regions_data, energy_type, start_date, end_date, key)
-        filtered_data_by_energy_by_region = filter_dataframe_by_region(
-            filtered_data_by_energy, st.session_state["region"]
-        )
+        display_map(regions_data, energy_type, start_date, end_date, figure_key, key)
 
     with col2:
         # Displaying combined energy chart and time aggregation selection
-        display_combined_energy_chart(
-            filtered_data_by_energy_by_region,
+        selection = Selection(
+            start_date,
+            end_date,
             st.session_state["region"],
             energy_type,
             st.session_state.get("time_interval", "Yearly"),
         )
+        display_combined_energy_chart(rollups, selection, cache_key=figure_key)
         sub_col1, sub_col2 = st.columns([0.48, 0.52])
         with sub_col1:
             st.selectbox(
@@ -136,31 +152,95 @@ def display_specific_energy_tab(
 
     col3, col4 = st.columns([0.5, 0.5])
     with col3:
-        fig = create_energy_region_pie_chart(regions_data, energy_type, 5)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = create_energy_region_pie_chart(
+            regions_data, energy_type, 5, cache_key=figure_key
+        )
+        with span("plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True)
 
     with col4:
         st.subheader(f"Region's stats ranked by {energy_type} volume:")
-
-        cols_to_drop = [
-            col for col in regions_data.columns if col.endswith("_millions")
-        ]
-        energy_cols = ["region"] + [
-            col
-            for col in regions_data.drop(cols_to_drop, axis=1)
-            if col.startswith(energy_type)
-        ] + ["total_volume"]
-        regions_data = regions_data.drop(cols_to_drop, axis=1)[energy_cols]
-        regions_data = regions_data.sort_values(by=f'{energy_type}_total_volume', ascending=False).reset_index(drop=True)
-        st.dataframe(regions_data, height=458)
+        with span("regional_table"):
+            display_regional_table(regions_data, energy_type, height=458)
     st.write('---')
     st.write(SPECIFIC_ENERGY_TAB_EXPLANATION.replace("[Energy Type]", energy_type))
 
-@st.cache_data
-def load_data():
-    dataset = pd.read_csv("data/France_Region_Auction_Data.csv")
-    dataset["date"] = pd.to_datetime(dataset["date"], format="%Y-%m")
-    return dataset
+@st.cache_resource
+def load_snapshot_store():
+    """
+    Loads the dataset and its aggregate cube once per process, and starts the watcher that swaps
+    in new data files in the background. The snapshot is shared by every session and must not
+    be modified.
+    """
+    return SnapshotStore()
+
+
+@st.cache_data(max_entries=256)
+def load_regional_statistics(_cube, start_date, end_date, range_token):
+    """
+    Aggregates the regional statistics of a date range from the cube. Memoized on the version
+    token of the months in the range rather than on the cube itself.
+    """
+    return regional_statistics(_cube, Selection(start_date, end_date))
+
+
+@st.cache_resource
+def load_warmup_pool():
+    """Starts the background threads precomputing views once per process."""
+    return WarmupPool()
+
+
+def warm_up_views(snapshot):
+    """
+    Queues the precomputation of the views of every option of the energy type selectbox over the
+    default date range of a snapshot, once per dataset version: regional statistics, map tooltips
+    and figures, under the same cache keys as `main`.
+
+    :param snapshot: The DatasetSnapshot being displayed.
+    """
+    cube, rollups = snapshot.cube, snapshot.rollups
+    start_date, end_date = default_date_range(snapshot.dataset)
+    range_token = range_version(snapshot.manifest, start_date, end_date)
+    figure_key = (start_date, end_date, range_token)
+
+    def regions_data():
+        return load_regional_statistics(cube, start_date, end_date, range_token)
+
+    def tooltips(energy_type):
+        warm_tooltip_properties(regions_data(), energy_type, start_date, end_date, figure_key)
+
+    def overview_chart(time_interval):
+        selection = Selection(start_date, end_date, time_interval=time_interval)
+        return get_combined_chart(rollups, selection, 1000, 500, cache_key=figure_key)
+
+    def energy_chart(energy_type, time_interval):
+        selection = Selection(start_date, end_date, "All Regions", energy_type, time_interval)
+        return get_combined_energy_chart(rollups, selection, cache_key=figure_key)
+
+    def pie_chart(energy_type):
+        return create_energy_region_pie_chart(regions_data(), energy_type, 5, cache_key=figure_key)
+
+    # Priorities follow the selectbox order; monthly charts, only seen after switching the time
+    # aggregation, come after every yearly view.
+    monthly = len(ENERGY_TYPES) + 1
+    tasks = [
+        (0, "regional statistics", regions_data),
+        (1, "All Renewables tooltips", partial(tooltips, "All Renewables")),
+        (1, "overview Yearly chart", partial(overview_chart, "Yearly")),
+        (monthly + 1, "overview Monthly chart", partial(overview_chart, "Monthly")),
+    ]
+    for priority, energy_type in enumerate(ENERGY_TYPES, start=2):
+        tasks += [
+            (priority, f"{energy_type} tooltips", partial(tooltips, energy_type)),
+            (priority, f"{energy_type} Yearly chart", partial(energy_chart, energy_type, "Yearly")),
+            (priority, f"{energy_type} pie chart", partial(pie_chart, energy_type)),
+            (
+                monthly + priority,
+                f"{energy_type} Monthly chart",
+                partial(energy_chart, energy_type, "Monthly"),
+            ),
+        ]
+    load_warmup_pool().schedule(snapshot.version, tasks)
 
 
 def main():
@@ -172,16 +252,23 @@ def main():
         page_title="Renewable Electricity Dashboard",
         page_icon="🌎",
     )
+    start_rerun()
     adjust_selectbox_position()
     st.markdown(WELCOME_MESSAGE)
 
-    # Loading data
-    dataset = load_data()
+    # Reading the current dataset snapshot once, so the whole rerun uses the same version
+    with span("snapshot"):
+        snapshot = load_snapshot_store().current()
+    cube = snapshot.cube
+    warm_up_views(snapshot)
 
-    # Displaying sidebar and filtering data based on user selection
-    start_date, end_date = display_date_filter_sidebar(dataset)
-    filtered_data = filter_dataframe_by_date(dataset, start_date, end_date)
-    regions_data = compute_regional_energy_statistics(filtered_data)
+    # Displaying sidebar and aggregating the selected date range from the cube
+    with span("sidebar"):
+        start_date, end_date = display_date_filter_sidebar(snapshot.dataset)
+    with span("load_regional_statistics"):
+        range_token = range_version(snapshot.manifest, start_date, end_date)
+        regions_data = load_regional_statistics(cube, start_date, end_date, range_token)
+    figure_key = (start_date, end_date, range_token)
 
     # Creating a dropdown for energy type selection and displaying the corresponding tab
     st.subheader("Choose an Energy Type:")
@@ -189,7 +276,7 @@ def main():
     st.write("")
     selected_energy_type = st.selectbox(
         "Choose an Energy Type:",
-        ["All Energy Types", "Onshore Wind", "Hydropower", "Solar", "Geothermal"],
+        ["All Energy Types"] + ENERGY_TYPES,
         label_visibility="hidden",
     )
 
@@ -198,7 +285,7 @@ def main():
         st.write('---')
         st.title("All Energy Types: Onshore Wind, Hydropower, Solar, and Geothermal")
         display_energy_overview_tab(
-            regions_data, filtered_data, "All Renewables", start_date, end_date
+            regions_data, snapshot.rollups, "All Renewables", start_date, end_date, figure_key
         )
 
     # Energy Specific tab
@@ -208,15 +295,13 @@ def main():
         st.write("")
         st.write("")
         st.write("")
-        filtered_data_by_energy = filter_dataframe_by_energy_type(
-            filtered_data, selected_energy_type
-        )
         display_specific_energy_tab(
             regions_data,
-            filtered_data_by_energy,
+            snapshot.rollups,
             selected_energy_type,
             start_date,
             end_date,
+            figure_key,
             key=selected_energy_type,
         )
     adjust_selectbox_position()
@@ -229,9 +314,13 @@ def main():
         st.subheader('Coordinator : [Mano Joseph MATHEW](https://www.linkedin.com/in/manomathew/)')
 
     with sub_col2:
-        image = Image.open('img/Efrei-logo.jpeg')
-        st.image(image)
+        st.image(load_logo())
+
+    # Showing the stage timings of this rerun when DASHBOARD_TIMING is set
+    display_timing_panel(finish_rerun())
 
 
 if __name__ == "__main__":
-    main()
+    # Background warm-up tasks wait for the rerun to end before starting
+    with load_warmup_pool().interactive():
+        main()
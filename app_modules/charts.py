@@ -1,95 +1,173 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
 
 from app_modules.colors import (
     ENERGY_TYPE_COLORS,
     ENERGY_TYPE_COLOR_GRADIENTS,
 )  # Importing custom color mappings
+from app_modules.figure_cache import FigureCache, figure_from_json
+from app_modules.query import (
+    season_percentages,
+    top_regions,
+    volume_by_energy_type,
+    volume_over_time,
+)
+from app_modules.timing import span, timed
 
 SUPTITLE_FONT_SIZE = 34  # Global constant to maintain uniformity in subtitle font size
 
+SEASON_COLORS = {
+    "Spring": "green",
+    "Summer": "yellow",
+    "Winter": "blue",
+    "Autumn": "orange",
+}
+
+
 # -------------------------------------------------------------
-# -- Visualization Functions for All Energy Types (Main Tab) --
+# --                    Figure Memoization                    --
 # -------------------------------------------------------------
 
 
-def create_pie_chart(df):
+@st.cache_resource
+def load_figure_cache():
+    """Returns the figure cache shared by all sessions of the process."""
+    return FigureCache()
+
+
+def cached_figure(figure_key, cache_key, build_figure):
     """
-    Function to create a pie chart representation for different energy types in the provided dataframe.
+    Function to memoize a figure on the filter state it is built from.
 
     Args:
-        df (pd.DataFrame): The input DataFrame containing energy data.
+        figure_key (tuple): The chart name and the selection the figure depends on, e.g. region,
+                            energy type and time interval.
+        cache_key (tuple): The date range and dataset version, or None to build without caching.
+        build_figure (callable): Builds the plotly Figure on a cache miss.
 
     Returns:
-        plotly.graph_objs.Figure: A pie chart figure visualizing the proportion of different energy types.
+        plotly.graph_objs.Figure: The cached or newly built figure.
     """
-    tech_volume = df.groupby("energy_type")["total_volume_sold"].sum().reset_index()
-    tech_volume["percent"] = (
-        tech_volume["total_volume_sold"] / tech_volume["total_volume_sold"].sum()
-    ) * 100
-
-    pie_fig = px.pie(
-        tech_volume,
-        values="total_volume_sold",
-        names="energy_type",
-        color="energy_type",
-        color_discrete_map=ENERGY_TYPE_COLORS,
+    if cache_key is None:
+        return build_figure()
+    figure_json = load_figure_cache().get_or_build(
+        figure_key + tuple(cache_key), build_figure
     )
-    pie_fig.update_traces(textinfo="percent+label")
-    return pie_fig
+    return figure_from_json(figure_json)
+
+# -------------------------------------------------------------
+# -- Visualization Functions for All Energy Types (Main Tab) --
+# -------------------------------------------------------------
 
 
-def create_bar_chart(df, time_interval):
+def create_pie_trace(volume_by_energy_type):
     """
-    Function to create a bar chart representation for different energy types over time in the provided dataframe.
+    Function to create the pie trace representing the proportion of each energy type.
 
     Args:
-        df (pd.DataFrame): The input DataFrame containing energy data.
-        time_interval (str): String denoting the time interval for grouping data; can be 'Monthly' or 'Yearly'.
+        volume_by_energy_type (pd.Series): The total volume sold, indexed by energy type.
 
     Returns:
-        plotly.graph_objs.Figure: A bar chart figure visualizing the total volume sold over time.
+        plotly.graph_objs.Pie: The pie trace, coloured with the energy type colors.
     """
-    df["date"] = pd.to_datetime(df["date"])
-    grouped_df = (
-        df.groupby(["date", "energy_type"])["total_volume_sold"].sum().reset_index()
+    import plotly.graph_objects as go
+
+    labels = [str(label) for label in volume_by_energy_type.index]
+    return go.Pie(
+        labels=labels,
+        values=volume_by_energy_type.to_numpy(),
+        textinfo="percent+label",
+        name="",
+        domain={"column": 0},
+        showlegend=False,
+        marker_colors=[ENERGY_TYPE_COLORS[label] for label in labels],
     )
 
-    if time_interval == "Yearly":
-        grouped_df["year"] = grouped_df["date"].dt.year
-        grouped_df = grouped_df.groupby(["year", "energy_type"], as_index=False)[
-            "total_volume_sold"
-        ].sum()
-        x_col = "year"
-    else:
-        x_col = "date"
-
-    bar_fig = px.bar(
-        grouped_df,
-        x=x_col,
-        y="total_volume_sold",
-        color="energy_type",
-        color_discrete_map=ENERGY_TYPE_COLORS,
+
+def create_bar_traces(periods, energy_types, volume, count, x_col):
+    """
+    Function to create one bar trace per energy type of the total volume sold over time.
+
+    Args:
+        periods (np.ndarray): The periods of the rows of `volume`, from `volume_over_time`.
+        energy_types (np.ndarray): The energy types of the columns of `volume`.
+        volume (np.ndarray): The (period x energy type) volume sold.
+        count (np.ndarray): The (period x energy type) row count; periods without rows are left out.
+        x_col (str): The name of the period axis.
+
+    Returns:
+        list: The plotly.graph_objs.Bar traces, in energy type order, of the energy types having
+              rows in the selection.
+    """
+    import plotly.graph_objects as go
+
+    traces = []
+    for column, energy_type in enumerate(energy_types):
+        rows = count[:, column] > 0
+        if not rows.any():
+            continue
+        energy_type = str(energy_type)
+        traces.append(
+            go.Bar(
+                x=periods[rows],
+                y=volume[rows, column],
+                name=energy_type,
+                legendgroup=energy_type,
+                marker_color=ENERGY_TYPE_COLORS[energy_type],
+                hovertemplate=f"energy_type={energy_type}<br>{x_col}=%{{x}}"
+                "<br>total_volume_sold=%{y}<extra></extra>",
+                showlegend=True,
+            )
+        )
+    return traces
+
+
+def display_combined_chart(rollups, selection, width, height, cache_key=None):
+    """
+    Function to create and display a combined chart with pie and bar charts for the selection.
+
+    Args:
+        rollups (Rollups): The rollups of the dataset.
+        selection (Selection): The date range, region and time interval of the chart; the time
+                               interval can be 'Monthly' or 'Yearly'.
+        width (int): Integer representing the width of the chart.
+        height (int): Integer representing the height of the chart.
+        cache_key (tuple, optional): Date range and dataset version used to memoize the figure.
+    """
+    fig = get_combined_chart(rollups, selection, width, height, cache_key)
+    with span("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def get_combined_chart(rollups, selection, width, height, cache_key=None):
+    """
+    Returns the figure of `display_combined_chart`, from the figure cache when it was already built
+    for the same selection; see `display_combined_chart` for the arguments.
+    """
+    return cached_figure(
+        ("combined_chart", selection.region, selection.time_interval, width, height),
+        cache_key,
+        lambda: create_combined_chart(rollups, selection, width, height),
     )
-    return bar_fig
 
 
-def display_combined_chart(df, region, width, height, time_interval):
+@timed()
+def create_combined_chart(rollups, selection, width, height):
     """
-    Function to create and display a combined chart with pie and bar charts for the provided data.
+    Function to create a combined chart with pie and bar charts for the selection.
 
     Args:
-        df (pd.DataFrame): The input DataFrame containing energy data.
-        region (str): String representing the region for which the chart is displayed.
+        rollups (Rollups): The rollups of the dataset.
+        selection (Selection): The date range, region and time interval of the chart; the time
+                               interval can be 'Monthly' or 'Yearly'.
         width (int): Integer representing the width of the chart.
         height (int): Integer representing the height of the chart.
-        time_interval (str): String representing the time interval for the bar chart; can be 'Monthly' or 'Yearly'.
+
+    Returns:
+        plotly.graph_objs.Figure: The combined pie and bar chart figure.
     """
-    pie_fig = create_pie_chart(df)
-    bar_fig = create_bar_chart(df, time_interval)
+    from plotly.subplots import make_subplots
+
+    periods, energy_types, volume, count, x_col = volume_over_time(rollups, selection)
 
     # Initializing subplot and configuring layout
     fig = make_subplots(
@@ -106,38 +184,24 @@ def display_combined_chart(df, region, width, height, time_interval):
         annotation["font"] = dict(size=20)
 
     # Adding traces for pie and bar charts to the subplot
-    fig.add_trace(
-        go.Pie(
-            labels=pie_fig["data"][0]["labels"],
-            values=pie_fig["data"][0]["values"],
-            textinfo="percent+label",
-            name="",
-            domain={"column": 0},
-            showlegend=False,
-            marker_colors=[
-                ENERGY_TYPE_COLORS[label] for label in pie_fig["data"][0]["labels"]
-            ],
-        ),
-        row=1,
-        col=1,
-    )
-    for trace in bar_fig["data"]:
-        fig.add_trace(trace.update(showlegend=True), row=1, col=2)
+    fig.add_trace(create_pie_trace(volume_by_energy_type(rollups, selection)), row=1, col=1)
+    for trace in create_bar_traces(periods, energy_types, volume, count, x_col):
+        fig.add_trace(trace, row=1, col=2)
 
-    # Updating layout and displaying the combined chart
+    # Updating layout of the combined chart
     fig.update_layout(
         legend_traceorder="reversed",
         height=height,
         width=width,
         barmode="stack",
-        title_text=f"{region}",
+        title_text=f"{selection.region}",
         title_x=0.3,
         title_font=dict(size=SUPTITLE_FONT_SIZE),
         legend_title_text="Energy Types :",
         legend_font_size=22,
         legend_title_font_size=18,
     )
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
 # --------------------------------------------------------------------
@@ -145,119 +209,121 @@ def display_combined_chart(df, region, width, height, time_interval):
 # --------------------------------------------------------------------
 
 
-def create_energy_bar_chart(df, energy_type, time_interval):
+def check_single_energy_type(energy_types):
+    """Raises a ValueError when the series of a chart hold more than one energy type."""
+    if len(energy_types) > 1:
+        raise ValueError("The series should have at most one energy type")
+
+
+def create_energy_bar_trace(periods, energy_types, volume, count, x_col, energy_type):
     """
-    Creates a bar chart representing total volume sold over time for a specific energy type.
+    Creates a bar trace representing total volume sold over time for a specific energy type.
 
     Args:
-        df (pd.DataFrame): The filtered input DataFrame containing energy data.
+        periods (np.ndarray): The periods of the rows of `volume`, from `volume_over_time`.
+        energy_types (np.ndarray): The energy types of the columns of `volume`, at most one.
+        volume (np.ndarray): The (period x energy type) volume sold.
+        count (np.ndarray): The (period x energy type) row count; periods without rows are left out,
+                            so a region without rows for the energy type gets an empty trace.
+        x_col (str): The name of the period axis.
         energy_type (str): String representing the specific energy type.
-        time_interval (str): String representing the time interval; can be 'Monthly' or 'Yearly'.
 
     Returns:
-        plotly.graph_objs.Figure: A bar chart figure visualizing the total volume sold over time.
+        plotly.graph_objs.Bar: A bar trace of the total volume sold over time.
     """
-    # Ensure DataFrame has a single unique energy type.
-    if df["energy_type"].nunique() != 1:
-        raise ValueError("DataFrame should have only one unique value in 'energy_type'")
-
-    df["date"] = pd.to_datetime(df["date"])
-    grouped_df = df.groupby(["date", "energy_type"], as_index=False)[
-        "total_volume_sold"
-    ].sum()
-
-    if time_interval == "Yearly":
-        # Extract the year directly from the "date" and group by it.
-        grouped_df["year"] = grouped_df["date"].dt.year
-        grouped_df = grouped_df.groupby("year", as_index=False)[
-            "total_volume_sold"
-        ].sum()
-        x_col = "year"
-    else:
-        x_col = "date"
-
-    fig = px.bar(
-        grouped_df,
-        x=x_col,
-        y="total_volume_sold",
-        labels={"total_volume_sold": "Total Volume Sold"},
-        title=f"Total Volume Sold Over Time for {energy_type} Energy",
+    import plotly.graph_objects as go
+
+    check_single_energy_type(energy_types)
+    rows = count.any(axis=1)
+
+    return go.Bar(
+        x=periods[rows],
+        y=volume[rows].sum(axis=1),
+        name="",
+        marker_color=ENERGY_TYPE_COLORS.get(energy_type, "grey"),
+        hovertemplate=f"{x_col}=%{{x}}<br>Total Volume Sold=%{{y}}<extra></extra>",
+        showlegend=False,
     )
-    # Update trace colors using the predefined energy type colors.
-    fig.update_traces(marker_color=ENERGY_TYPE_COLORS.get(energy_type, "grey"))
 
-    return fig
 
-
-def create_energy_season_bar_chart(df, energy_type):
+def create_season_bar_traces(season_df):
     """
-    Creates a bar chart representing the percentage of total volume sold in different seasons for a specific energy type.
+    Creates one bar trace per season of the percentage of total volume sold.
 
     Args:
-        df (pd.DataFrame): The filtered input DataFrame containing energy data.
-        energy_type (str): String representing the specific energy type.
+        season_df (pd.DataFrame): The percentages per season, from `season_percentages`.
 
     Returns:
-        plotly.graph_objs.Figure: A bar chart figure visualizing the percentage of total volume sold in different seasons.
+        list: The plotly.graph_objs.Bar traces, in calendar order.
     """
-    if df["energy_type"].nunique() != 1:
-        raise ValueError("DataFrame should have only one unique value in 'energy_type'")
-
-    seasons_mapping = {
-        12: "Winter",
-        1: "Winter",
-        2: "Winter",
-        3: "Spring",
-        4: "Spring",
-        5: "Spring",
-        6: "Summer",
-        7: "Summer",
-        8: "Summer",
-        9: "Autumn",
-        10: "Autumn",
-        11: "Autumn",
-    }
-    df["season"] = df["date"].dt.month.map(seasons_mapping)
-    grouped_df = df.groupby("season")["total_volume_sold"].sum().reset_index()
-    grouped_df["percentage_of_total"] = (
-        grouped_df["total_volume_sold"] / df["total_volume_sold"].sum()
-    ) * 100
-    grouped_df["season"] = grouped_df["season"].astype(
-        pd.CategoricalDtype(
-            categories=["Winter", "Spring", "Summer", "Autumn"], ordered=True
+    import plotly.graph_objects as go
+
+    return [
+        go.Bar(
+            x=[season],
+            y=[percentage],
+            name=season,
+            marker_color=SEASON_COLORS[season],
+            hovertemplate="Season=%{x}<br>Percentage of Sold Energy=%{y}<extra></extra>",
+            width=0.4,
+            showlegend=False,
         )
+        for season, percentage in zip(season_df["season"], season_df["percentage_of_total"])
+    ]
+
+
+def display_combined_energy_chart(rollups, selection, cache_key=None):
+    """
+    Creates and displays a combined chart with bar charts for the selection of a specific energy type.
+
+    Args:
+        rollups (Rollups): The rollups of the dataset.
+        selection (Selection): The date range, region, energy type and time interval of the
+                               chart; the time interval can be 'Monthly' or 'Yearly'.
+        cache_key (tuple, optional): Date range and dataset version used to memoize the figure.
+    """
+    fig = get_combined_energy_chart(rollups, selection, cache_key)
+    with span("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def get_combined_energy_chart(rollups, selection, cache_key=None):
+    """
+    Returns the figure of `display_combined_energy_chart`, from the figure cache when it was
+    already built for the same selection; see `display_combined_energy_chart` for the arguments.
+    """
+    return cached_figure(
+        (
+            "combined_energy_chart",
+            selection.region,
+            selection.energy_type,
+            selection.time_interval,
+        ),
+        cache_key,
+        lambda: create_combined_energy_chart(rollups, selection),
     )
-    grouped_df = grouped_df.sort_values(by="season")
-
-    fig = px.bar(
-        grouped_df,
-        x="season",
-        y="percentage_of_total",
-        color="season",
-        color_discrete_map={
-            "Spring": "green",
-            "Summer": "yellow",
-            "Winter": "blue",
-            "Autumn": "orange",
-        },
-        labels={"percentage_of_total": "Percentage of Sold Energy", "season": "Season"},
-        title=f"Percentage of {energy_type} Sold per Season",
-    )
-    return fig
 
 
-def display_combined_energy_chart(df, region, energy_type, time_interval):
+@timed()
+def create_combined_energy_chart(rollups, selection):
     """
-    Creates and displays a combined chart with bar charts for the provided data representing a specific energy type.
+    Creates a combined chart with bar charts for the selection of a specific energy type.
 
     Args:
-        df (pd.DataFrame): The input DataFrame containing energy data.
-        region (str): String representing the region for which the chart is displayed.
-        energy_type (str): String representing the specific energy type.
-        time_interval (str): String representing the time interval for the bar chart; can be 'Monthly' or 'Yearly'.
+        rollups (Rollups): The rollups of the dataset.
+        selection (Selection): The date range, region, energy type and time interval of the
+                               chart; the time interval can be 'Monthly' or 'Yearly'.
+
+    Returns:
+        plotly.graph_objs.Figure: The combined over-time and seasonal bar chart figure.
     """
-    energy_bar_fig = create_energy_bar_chart(df, energy_type, time_interval)
-    energy_season_fig = create_energy_season_bar_chart(df, energy_type)
+    from plotly.subplots import make_subplots
+
+    energy_type = selection.energy_type
+    energy_bar_trace = create_energy_bar_trace(
+        *volume_over_time(rollups, selection), energy_type
+    )
+    season_df = season_percentages(rollups, selection)
 
     fig = make_subplots(
         rows=1,
@@ -268,18 +334,17 @@ def display_combined_energy_chart(df, region, energy_type, time_interval):
             f"Percentage of {energy_type} Sold per Season",
         ),
     )
-    for trace in energy_season_fig["data"]:
-        fig.add_trace(trace.update(width=0.4, showlegend=False), row=1, col=2)
-    for trace in energy_bar_fig["data"]:
-        fig.add_trace(trace.update(showlegend=False), row=1, col=1)
+    for trace in create_season_bar_traces(season_df):
+        fig.add_trace(trace, row=1, col=2)
+    fig.add_trace(energy_bar_trace, row=1, col=1)
 
     fig.update_layout(
-        title_text=region, title_x=0.4, title_font=dict(size=SUPTITLE_FONT_SIZE)
+        title_text=selection.region, title_x=0.4, title_font=dict(size=SUPTITLE_FONT_SIZE)
     )
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def create_energy_region_pie_chart(region_df, energy_type, n):
+def create_energy_region_pie_chart(region_df, energy_type, n, cache_key=None):
     """
     Creates a pie chart visualizing total volume sold by region for a specific energy type.
 
@@ -287,28 +352,30 @@ def create_energy_region_pie_chart(region_df, energy_type, n):
         region_df (pd.DataFrame): The input DataFrame containing energy data.
         energy_type (str): String representing the specific energy type.
         n (int): Integer representing the number of top regions to be displayed separately in the pie chart.
+        cache_key (tuple, optional): Date range and dataset version used to memoize the figure.
 
     Returns:
         plotly.graph_objs.Figure: A pie chart figure visualizing the total volume sold by region.
     """
+    return cached_figure(
+        ("energy_region_pie_chart", energy_type, n),
+        cache_key,
+        lambda: build_energy_region_pie_chart(region_df, energy_type, n),
+    )
+
+
+@timed()
+def build_energy_region_pie_chart(region_df, energy_type, n):
+    """
+    Builds the pie chart of `create_energy_region_pie_chart` without memoization.
+
+    Returns:
+        plotly.graph_objs.Figure: A pie chart figure visualizing the total volume sold by region.
+    """
+    import plotly.express as px
+
     col_name = energy_type + "_total_volume"
-    if col_name not in region_df.columns:
-        raise ValueError(f"{col_name} does not exist in the DataFrame")
-
-    # Sort and select data
-    sorted_df = region_df.sort_values(by=col_name, ascending=False)
-    top_n_df = sorted_df.head(n)
-
-    if len(region_df) > n:
-        other_df = pd.DataFrame(
-            {
-                "region": ["Other regions"],
-                col_name: [sorted_df.iloc[n:][col_name].sum()],
-            }
-        )
-        final_df = pd.concat([top_n_df, other_df], ignore_index=True)
-    else:
-        final_df = top_n_df
+    final_df, top_n_df = top_regions(region_df, energy_type, n)
 
     # Get the color scale based on the energy type
     colorscale = px.colors.sequential.__dict__[ENERGY_TYPE_COLOR_GRADIENTS[energy_type]]
@@ -2,6 +2,10 @@
 This module defines color mappings for different energy types to be used in visualizations throughout the application.
 """
 
+# The fixed dictionary of energy types. The dataset stores energy types as categorical codes
+# into this list, and the app lists them in this order.
+ENERGY_TYPES = ["Onshore Wind", "Hydropower", "Solar", "Geothermal"]
+
 # Define constant dictionaries to hold the color and gradient values associated with each energy type.
 
 # A Dictionary containing color mappings for individual energy types
@@ -0,0 +1,165 @@
+"""
+This module builds the (month x region x energy type) aggregate cube of the dataset.
+
+The cube is built once at load time together with its cumulative sums along the month axis, so
+the totals of any date range are the difference of two slices of the cumulative sums. The
+regional statistics and the chart inputs are then derived from the cube instead of the raw rows.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from app_modules.filter import regional_statistics_from_volumes
+from app_modules.timing import timed
+
+
+class AggregateCube(NamedTuple):
+    """Dense aggregates of the dataset. Month-indexed arrays have shape (month, region, energy type)."""
+
+    months: np.ndarray  # First day of each month, as datetime64, without gaps.
+    regions: np.ndarray  # Region names, in the order of their dictionary (sorted).
+    energy_types: np.ndarray  # Energy types, in the order of their dictionary.
+    volume: np.ndarray  # Total volume sold per cell.
+    count: np.ndarray  # Number of dataset rows per cell.
+    volume_cumsum: np.ndarray  # Cumulative volume, with a leading zero slice.
+    count_cumsum: np.ndarray  # Cumulative row count, with a leading zero slice.
+
+
+@timed()
+def build_aggregate_cube(dataset):
+    """
+    Aggregates the dataset into a dense (month x region x energy type) cube.
+
+    Args:
+        dataset (pd.DataFrame): The dataset with 'date', 'region', 'energy_type' and
+                                'total_volume_sold' columns, dates being first days of months and
+                                'region' and 'energy_type' being categoricals.
+
+    Returns:
+        AggregateCube: The cube and its cumulative sums along the month axis, as read-only
+                       arrays since the cube is shared by every session.
+    """
+    dates = pd.DatetimeIndex(dataset["date"])
+    month_number = dates.year.to_numpy() * 12 + dates.month.to_numpy() - 1
+    first_month = month_number.min()
+    month_idx = month_number - first_month
+    n_months = int(month_idx.max()) + 1
+
+    # The categorical codes index the cube directly: its axes are the fixed dictionaries.
+    region_idx = dataset["region"].cat.codes.to_numpy()
+    energy_idx = dataset["energy_type"].cat.codes.to_numpy()
+    regions = dataset["region"].cat.categories
+    energy_types = dataset["energy_type"].cat.categories
+    shape = (n_months, len(regions), len(energy_types))
+
+    flat_idx = np.ravel_multi_index((month_idx, region_idx, energy_idx), shape)
+    weights = np.nan_to_num(dataset["total_volume_sold"].to_numpy(dtype="float64"))
+    size = n_months * len(regions) * len(energy_types)
+    volume = np.bincount(flat_idx, weights=weights, minlength=size).reshape(shape)
+    count = np.bincount(flat_idx, minlength=size).reshape(shape)
+
+    zeros = np.zeros((1,) + shape[1:])
+    cube = AggregateCube(
+        months=pd.date_range(dates.min(), periods=n_months, freq="MS").to_numpy(),
+        regions=np.asarray(regions, dtype=str),
+        energy_types=np.asarray(energy_types, dtype=str),
+        volume=volume,
+        count=count,
+        volume_cumsum=np.concatenate([zeros, volume.cumsum(axis=0)]),
+        count_cumsum=np.concatenate([zeros.astype(count.dtype), count.cumsum(axis=0)]),
+    )
+    for array in cube:
+        array.setflags(write=False)
+    return cube
+
+
+def cube_month_range(cube, start_date, end_date):
+    """
+    Locates the months whose first day is within [start_date, end_date].
+
+    Returns:
+        tuple: The (start, stop) positions of the months along the month axis.
+    """
+    start = np.searchsorted(cube.months, np.datetime64(pd.Timestamp(start_date)), "left")
+    stop = np.searchsorted(cube.months, np.datetime64(pd.Timestamp(end_date)), "right")
+    return start, max(start, stop)
+
+
+def cube_range_totals(cube, start_date, end_date):
+    """
+    Sums the cube over a date range in constant time from the cumulative sums.
+
+    Returns:
+        tuple: The (region x energy type) volume and row count arrays of the range.
+    """
+    start, stop = cube_month_range(cube, start_date, end_date)
+    volume = cube.volume_cumsum[stop] - cube.volume_cumsum[start]
+    count = cube.count_cumsum[stop] - cube.count_cumsum[start]
+    return volume, count
+
+
+def compute_regional_energy_statistics_from_cube(cube, start_date, end_date):
+    """
+    Computes the regional statistics of `compute_regional_energy_statistics` from the cube.
+
+    Args:
+        cube (AggregateCube): The aggregate cube of the dataset.
+        start_date (datetime): The start date of the range.
+        end_date (datetime): The end date of the range.
+
+    Returns:
+        pd.DataFrame: The aggregated energy statistics at the regional level, restricted to the
+                      regions and energy types having rows in the range.
+    """
+    volume, count = cube_range_totals(cube, start_date, end_date)
+    regions_mask = count.sum(axis=1) > 0
+    energy_mask = count.sum(axis=0) > 0
+
+    volume_by_type = pd.DataFrame(
+        np.where(count > 0, volume, np.nan)[np.ix_(regions_mask, energy_mask)],
+        index=pd.Index(cube.regions[regions_mask], name="region"),
+        columns=cube.energy_types[energy_mask],
+    )
+    return regional_statistics_from_volumes(volume_by_type)
+
+
+def cube_to_dataframe(cube, start_date, end_date, region="All Regions", energy_type=""):
+    """
+    Builds the monthly chart input of a selection from the cube.
+
+    Args:
+        cube (AggregateCube): The aggregate cube of the dataset.
+        start_date (datetime): The start date of the range.
+        end_date (datetime): The end date of the range.
+        region (str): The selected region, or 'All Regions'.
+        energy_type (str): The selected energy type, or an empty string for all of them.
+
+    Returns:
+        pd.DataFrame: One row per month and energy type having rows in the selection, with
+                      'date', 'energy_type' and 'total_volume_sold' columns; 'energy_type' is
+                      coded with the dictionary of the cube, so charts group on its codes.
+    """
+    start, stop = cube_month_range(cube, start_date, end_date)
+    if region == "All Regions":
+        region_mask = slice(None)
+    else:
+        region_mask = cube.regions == region
+
+    energy_idx = np.arange(len(cube.energy_types))
+    if energy_type != "":
+        energy_idx = np.flatnonzero(cube.energy_types == energy_type)
+    volume = cube.volume[start:stop, region_mask][..., energy_idx].sum(axis=1)
+    count = cube.count[start:stop, region_mask][..., energy_idx].sum(axis=1)
+
+    month_pos, energy_pos = np.nonzero(count)
+    return pd.DataFrame(
+        {
+            "date": cube.months[start:stop][month_pos],
+            "energy_type": pd.Categorical.from_codes(
+                energy_idx[energy_pos], dtype=pd.CategoricalDtype(cube.energy_types)
+            ),
+            "total_volume_sold": volume[month_pos, energy_pos],
+        }
+    )
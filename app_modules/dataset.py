@@ -0,0 +1,398 @@
+"""
+This module reads the auction dataset from disk and builds the typed columnar copy of it.
+
+`preprocess_data.ingest` (formerly the preprocessing notebook) writes
+`data/France_Region_Auction_Data.csv`. Running this module as a script converts that CSV into a
+Parquet file holding only the columns used by the dashboard, with compact dtypes:
+
+    python -m app_modules.dataset
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from app_modules.colors import ENERGY_TYPES
+from app_modules.timing import timed
+
+CSV_PATH = "data/France_Region_Auction_Data.csv"
+COLUMNAR_PATH = "data/France_Region_Auction_Data.parquet"
+
+# Columns used by the dashboard; the geometry columns ('geom', 'geo_point_2d') stay on disk.
+DATASET_COLUMNS = ["date", "region", "energy_type", "total_volume_sold"]
+
+# The fixed dictionary of regions, the names used by the regions GeoJSON, sorted. Together with
+# ENERGY_TYPES it gives every dataset version the same categorical codes.
+REGIONS = sorted(
+    [
+        "Auvergne-Rhône-Alpes",
+        "Bourgogne-Franche-Comté",
+        "Bretagne",
+        "Centre-Val de Loire",
+        "Corse",
+        "Grand Est",
+        "Guadeloupe",
+        "Guyane",
+        "Hauts-de-France",
+        "La Réunion",
+        "Martinique",
+        "Mayotte",
+        "Normandie",
+        "Nouvelle-Aquitaine",
+        "Occitanie",
+        "Pays de la Loire",
+        "Provence-Alpes-Côte d'Azur",
+        "Île-de-France",
+    ]
+)
+CATEGORY_DICTIONARIES = {"region": REGIONS, "energy_type": ENERGY_TYPES}
+
+# Manifests are stored next to the dataset file they describe, and kept in memory per path.
+MANIFEST_SUFFIX = ".manifest.json"
+_manifests = {}
+
+# Columns derived from 'date' once at load time, so that no caller has to add them.
+DERIVED_COLUMNS = ["month", "year", "season"]
+
+SEASONS = ["Winter", "Spring", "Summer", "Autumn"]
+SEASONS_MAPPING = {
+    12: "Winter",
+    1: "Winter",
+    2: "Winter",
+    3: "Spring",
+    4: "Spring",
+    5: "Spring",
+    6: "Summer",
+    7: "Summer",
+    8: "Summer",
+    9: "Autumn",
+    10: "Autumn",
+    11: "Autumn",
+}
+
+
+def compact_volume(volume):
+    """
+    Converts a volume column to the smallest dtype that represents it without loss.
+
+    Args:
+        volume (pd.Series): The volume column as parsed from the CSV.
+
+    Returns:
+        pd.Series: The column as int64 when every value is a whole number, float32 when the
+                   round trip through float32 is exact, and float64 otherwise.
+    """
+    values = volume.to_numpy(dtype="float64")
+    if not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+        return volume.astype("int64")
+    if np.array_equal(values.astype("float32").astype("float64"), values, equal_nan=True):
+        return volume.astype("float32")
+    return volume.astype("float64")
+
+
+def dictionary_dtype(values, dictionary):
+    """
+    Builds the categorical dtype of a column from its fixed dictionary.
+
+    Args:
+        values (pd.Series): The column values.
+        dictionary (list): The known values, in code order.
+
+    Returns:
+        pd.CategoricalDtype: The dictionary, followed by the values missing from it, sorted, so
+                             that unexpected values keep their rows and known values their codes.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        present = values.cat.categories
+    else:
+        present = values.dropna().unique()
+    unknown = sorted(set(present) - set(dictionary))
+    return pd.CategoricalDtype(list(dictionary) + unknown)
+
+
+def apply_category_dictionaries(dataset):
+    """
+    Encodes 'region' and 'energy_type' as codes into their fixed dictionaries.
+
+    Returns:
+        pd.DataFrame: The dataset with both columns as categoricals of the CATEGORY_DICTIONARIES.
+    """
+    return dataset.assign(
+        **{
+            column: dataset[column].astype(dictionary_dtype(dataset[column], dictionary))
+            for column, dictionary in CATEGORY_DICTIONARIES.items()
+        }
+    )
+
+
+def compact_dataset(dataset):
+    """
+    Keeps the dashboard columns of a raw dataset and gives them compact dtypes.
+
+    Args:
+        dataset (pd.DataFrame): The dataset as written by the preprocessing notebook, with
+                                'date' as 'YYYY-MM' strings or datetimes.
+
+    Returns:
+        pd.DataFrame: A new DataFrame sorted by date, with 'date' as datetime64, 'region' and
+                      'energy_type' as codes into their fixed dictionaries and
+                      'total_volume_sold' as int64/float32/float64.
+    """
+    compact = pd.DataFrame(
+        {
+            "date": pd.to_datetime(dataset["date"], format="%Y-%m"),
+            "region": dataset["region"],
+            "energy_type": dataset["energy_type"],
+            "total_volume_sold": compact_volume(dataset["total_volume_sold"]),
+        }
+    )
+    return sort_dataset_by_date(apply_category_dictionaries(compact))
+
+
+def sort_dataset_by_date(dataset):
+    """
+    Guarantees the date order the filters rely on for binary search.
+
+    Args:
+        dataset (pd.DataFrame): The dataset, usually already sorted by the preprocessing step.
+
+    Returns:
+        pd.DataFrame: The dataset sorted by date, keeping the row order within a date, with a
+                      fresh RangeIndex so that index labels are row positions.
+    """
+    if not dataset["date"].is_monotonic_increasing:
+        dataset = dataset.sort_values("date", kind="stable")
+    return dataset.reset_index(drop=True)
+
+
+def add_derived_columns(dataset):
+    """
+    Adds the period and season columns derived from 'date'.
+
+    Args:
+        dataset (pd.DataFrame): The compact dataset.
+
+    Returns:
+        pd.DataFrame: A new DataFrame with the 'month' and 'year' periods and the ordered
+                      'season' categorical appended to the dataset columns.
+    """
+    dates = dataset["date"].dt
+    season_codes = np.array([SEASONS.index(SEASONS_MAPPING[month]) for month in range(1, 13)])
+    return dataset.assign(
+        month=dates.to_period("M"),
+        year=dates.to_period("Y"),
+        season=pd.Categorical.from_codes(
+            season_codes[dates.month.to_numpy() - 1], categories=SEASONS, ordered=True
+        ),
+    )
+
+
+def has_loaded_columns(dataset):
+    """
+    Returns True when the dataset holds exactly the columns `load_dataset` returns. The loaded
+    dataset is shared by every session, so a column added by a caller means it was modified.
+    """
+    return list(dataset.columns) == DATASET_COLUMNS + DERIVED_COLUMNS
+
+
+def read_csv_dataset(path=CSV_PATH):
+    """Parses the dashboard columns of the CSV dataset. Returns a compact DataFrame."""
+    return compact_dataset(pd.read_csv(path, usecols=DATASET_COLUMNS))
+
+
+def read_columnar_dataset(path=COLUMNAR_PATH):
+    """Reads the dashboard columns of the columnar dataset. Returns a compact DataFrame."""
+    dataset = pd.read_parquet(path, columns=DATASET_COLUMNS)
+    return sort_dataset_by_date(apply_category_dictionaries(dataset))
+
+
+def build_columnar_dataset(csv_path=CSV_PATH, columnar_path=COLUMNAR_PATH):
+    """
+    Converts the CSV dataset into the typed columnar file read by `load_dataset`.
+
+    Args:
+        csv_path (str): Path of the CSV written by the preprocessing notebook.
+        columnar_path (str): Path of the Parquet file to write.
+
+    Returns:
+        pd.DataFrame: The compact dataset that was written.
+    """
+    dataset = read_csv_dataset(csv_path)
+    dataset.to_parquet(columnar_path, index=False)
+    return dataset
+
+
+def columnar_dataset_is_current(csv_path=CSV_PATH, columnar_path=COLUMNAR_PATH):
+    """Returns True when the columnar file exists and is not older than the CSV it was built from."""
+    if not os.path.exists(columnar_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(columnar_path) >= os.path.getmtime(csv_path)
+
+
+def current_dataset_path(csv_path=CSV_PATH, columnar_path=COLUMNAR_PATH):
+    """Returns the path of the file `load_dataset` reads."""
+    return columnar_path if columnar_dataset_is_current(csv_path, columnar_path) else csv_path
+
+
+def file_content_hash(path, block_size=2**20):
+    """Returns the SHA-256 hex digest of a file, read block by block."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as data_file:
+        for block in iter(lambda: data_file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def month_hashes(dataset):
+    """
+    Fingerprints the rows of each month of the dataset.
+
+    Args:
+        dataset (pd.DataFrame): The compact dataset.
+
+    Returns:
+        dict: A hex digest per 'YYYY-MM' month, which changes whenever a row of that month is
+              added, removed or modified, but not when rows are only reordered.
+    """
+    row_hashes = pd.util.hash_pandas_object(dataset[DATASET_COLUMNS], index=False).to_numpy()
+    month_codes, months = pd.factorize(dataset["date"].dt.to_period("M"), sort=True)
+    sums = np.zeros(len(months), dtype="uint64")
+    np.add.at(sums, month_codes, row_hashes)
+    return {str(month): f"{value:016x}" for month, value in zip(months, sums)}
+
+
+def build_dataset_manifest(path, dataset, stat=None):
+    """
+    Describes a dataset file: its modification time and size, content hash, row count, month
+    range and per-month fingerprints.
+
+    Args:
+        path (str): The dataset file.
+        dataset (pd.DataFrame): The dataset read from the file, as `load_dataset` returns it, so
+                                that building the manifest does not parse the file again.
+        stat (os.stat_result, optional): The status of the file taken before it was read, so that
+                                         a change during the read makes the manifest stale.
+
+    Returns:
+        dict: The manifest.
+    """
+    stat = stat or os.stat(path)
+    hashes = month_hashes(dataset)
+    return {
+        "file": os.path.basename(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "content_hash": file_content_hash(path),
+        "rows": len(dataset),
+        "first_month": min(hashes, default=None),
+        "last_month": max(hashes, default=None),
+        "month_hashes": hashes,
+    }
+
+
+def manifest_matches(manifest, path):
+    """Returns True when the manifest was built from the file as it is now on disk."""
+    stat = os.stat(path)
+    return (
+        manifest is not None
+        and manifest["file"] == os.path.basename(path)
+        and manifest["mtime_ns"] == stat.st_mtime_ns
+        and manifest["size"] == stat.st_size
+    )
+
+
+def read_manifest_file(manifest_path):
+    """Returns the manifest stored at `manifest_path`, or None when it is missing or unreadable."""
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def recorded_dataset_manifest(path):
+    """
+    Returns the manifest recorded for a dataset file, in memory or next to the file, when it still
+    matches the file on disk, so checking it on every rerun costs a `stat`.
+
+    Returns:
+        dict: The manifest, see `build_dataset_manifest`, or None when the file has to be read to
+              build it.
+    """
+    manifest = _manifests.get(path)
+    if not manifest_matches(manifest, path):
+        manifest = read_manifest_file(path + MANIFEST_SUFFIX)
+        if not manifest_matches(manifest, path):
+            return None
+        _manifests[path] = manifest
+    return manifest
+
+
+def record_dataset_manifest(path, manifest):
+    """
+    Records a manifest built by `build_dataset_manifest`. It is saved next to the file when the
+    data directory is writable, so other processes do not read and hash the file again.
+    """
+    try:
+        with open(path + MANIFEST_SUFFIX, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file)
+    except OSError:
+        pass
+    _manifests[path] = manifest
+
+
+def dataset_version(manifest):
+    """Returns the version token of the whole dataset, a prefix of its content hash."""
+    return manifest["content_hash"][:16]
+
+
+def range_version(manifest, start_date, end_date):
+    """
+    Returns the version token of the months within [start_date, end_date].
+
+    Results computed over a date range only depend on the rows of its months, so keying caches on
+    this token keeps them valid when a data refresh changes or appends other months.
+    """
+    first = pd.Timestamp(start_date).strftime("%Y-%m")
+    last = pd.Timestamp(end_date).strftime("%Y-%m")
+    digest = hashlib.sha256()
+    for month, month_hash in sorted(manifest["month_hashes"].items()):
+        if first <= month <= last:
+            digest.update(f"{month}:{month_hash};".encode())
+    return digest.hexdigest()[:16]
+
+
+@timed()
+def load_dataset(csv_path=CSV_PATH, columnar_path=COLUMNAR_PATH):
+    """
+    Loads the dataset, preferring the columnar file and falling back to the CSV.
+
+    Args:
+        csv_path (str): Path of the CSV dataset.
+        columnar_path (str): Path of the columnar dataset.
+
+    Returns:
+        pd.DataFrame: The compact dataset with the columns listed in DATASET_COLUMNS, sorted by
+                      date, followed by the DERIVED_COLUMNS.
+    """
+    if columnar_dataset_is_current(csv_path, columnar_path):
+        dataset = read_columnar_dataset(columnar_path)
+    else:
+        dataset = read_csv_dataset(csv_path)
+    return add_derived_columns(dataset)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the columnar dashboard dataset.")
+    parser.add_argument("--csv", default=CSV_PATH, help="CSV dataset to convert.")
+    parser.add_argument("--output", default=COLUMNAR_PATH, help="Parquet file to write.")
+    args = parser.parse_args()
+
+    dataset = build_columnar_dataset(args.csv, args.output)
+    print(f"Wrote {len(dataset)} rows to {args.output}")
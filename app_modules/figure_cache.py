@@ -0,0 +1,78 @@
+"""
+This module defines the bounded LRU cache of serialized Plotly figures shared by all sessions.
+
+Figures are keyed on the filter state they were built from (region, energy type, time interval,
+date range and dataset version), so a repeated view costs a dictionary lookup instead of the
+pandas and Plotly work of building the figure again.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_FIGURES = 256
+
+
+class FigureCache:
+    """A thread-safe LRU cache of figure JSON strings, with hit and miss counters."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_FIGURES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build_figure):
+        """
+        Returns the JSON of the figure cached under `key`, building and caching it on a miss.
+
+        Args:
+            key (tuple): Hashable description of the filter state the figure depends on.
+            build_figure (callable): Builds the plotly Figure when it is not cached.
+
+        Returns:
+            str: The serialized figure.
+        """
+        with self._lock:
+            figure_json = self._figures.get(key)
+            if figure_json is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return figure_json
+            self.misses += 1
+
+        figure_json = build_figure().to_json()
+        with self._lock:
+            self._figures[key] = figure_json
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return figure_json
+
+    def stats(self):
+        """Returns the hit and miss counters and the number of cached figures."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._figures),
+                "max_entries": self.max_entries,
+            }
+
+    def clear(self):
+        """Drops every cached figure and resets the counters."""
+        with self._lock:
+            self._figures.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def figure_from_json(figure_json):
+    """
+    Rebuilds a plotly Figure from cached JSON. Validation is skipped since the JSON was
+    produced from an already validated figure; it dominates the cost of `plotly.io.from_json`.
+    """
+    import plotly.graph_objects as go
+
+    return go.Figure(json.loads(figure_json), _validate=False)
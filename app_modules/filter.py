@@ -1,7 +1,9 @@
 import pandas as pd
-import streamlit as st
 
+from app_modules.timing import timed
 
+
+@timed()
 def filter_dataframe_by_date(df, start_date, end_date):
     """
     Filters a DataFrame to include only rows where the 'date' column is within the specified date range.
@@ -12,42 +14,34 @@ def filter_dataframe_by_date(df, start_date, end_date):
         end_date (datetime): The end date of the filtering range.
 
     Returns:
-        pd.DataFrame: A new DataFrame consisting only of rows within the specified date range.
+        pd.DataFrame: A DataFrame consisting only of rows within the specified date range; a
+                      positional slice without copy when the DataFrame is sorted by date.
     """
+    if df["date"].is_monotonic_increasing:
+        return slice_dataframe_by_date(df, start_date, end_date)
     mask = (df["date"] >= start_date) & (df["date"] <= end_date)
     return df[mask]
 
 
-def filter_dataframe_by_region(df, region):
+def slice_dataframe_by_date(df, start_date, end_date):
     """
-    Filters a DataFrame to include only rows where the 'region' column matches the specified region.
+    Slices a DataFrame sorted by date to the rows within the specified date range.
 
     Args:
-        df (pd.DataFrame): The original DataFrame to be filtered.
-        region (str): The target region to filter by.
-
-    Returns:
-        pd.DataFrame: If 'All Regions' is selected, returns the original DataFrame;
-                      otherwise, returns a DataFrame consisting only of rows where the 'region' column matches the specified region.
-    """
-    return df if region == "All Regions" else df[df["region"] == region]
-
-
-def filter_dataframe_by_energy_type(df, energy_type):
-    """
-    Filters a DataFrame to include only rows where the 'energy_type' column matches the specified energy type.
-
-    Args:
-        df (pd.DataFrame): The original DataFrame to be filtered.
-        energy_type (str): The target energy type to filter by.
+        df (pd.DataFrame): A DataFrame whose 'date' column is sorted in increasing order.
+        start_date (datetime): The start date of the range.
+        end_date (datetime): The end date of the range.
 
     Returns:
-        pd.DataFrame: If an empty string is provided for energy_type, returns the original DataFrame;
-                      otherwise, returns a DataFrame consisting only of rows where the 'energy_type' column matches the specified energy type.
+        pd.DataFrame: The rows within the range, located by binary search and returned as a
+                      positional slice of `df` without copying the data.
     """
-    return df if energy_type == "" else df[df["energy_type"] == energy_type]
+    start = df["date"].searchsorted(pd.Timestamp(start_date), side="left")
+    stop = df["date"].searchsorted(pd.Timestamp(end_date), side="right")
+    return df.iloc[start:max(start, stop)]
 
 
+@timed()
 def compute_regional_energy_statistics(filtered_df):
     """
     Aggregates energy statistics at the regional level, computing total volumes and percentages for each energy type.
@@ -58,93 +52,40 @@ def compute_regional_energy_statistics(filtered_df):
     Returns:
         pd.DataFrame: A new DataFrame with aggregated energy statistics at the regional level.
     """
-    energy_types = filtered_df["energy_type"].unique()
-    total_volume_df = (
-        filtered_df.groupby("region")
-        .agg(total_volume=("total_volume_sold", "sum"))
-        .reset_index()
+    # One groupby over the (region, energy type) codes, unstacked into one column per energy type
+    # in dictionary order; NaN marks the regions without rows for a type.
+    volume_by_type = (
+        filtered_df.groupby(["region", "energy_type"], observed=True)["total_volume_sold"]
+        .sum()
+        .unstack("energy_type")
     )
-    total_volume_df["total_volume_millions"] = (
-        total_volume_df["total_volume"] / 1_000_000
-    )
-
-    # Iterate over each unique energy type and merge the corresponding aggregated data into the regions_df DataFrame
-    regions_df = total_volume_df
-    for energy_type in energy_types:
-        energy_df = filtered_df[filtered_df["energy_type"] == energy_type]
-        grouped_df = (
-            energy_df.groupby("region")
-            .agg(**{f"{energy_type}_total_volume": ("total_volume_sold", "sum")})
-            .reset_index()
-        )
-        grouped_df[f"{energy_type}_total_volume_millions"] = (
-            grouped_df[f"{energy_type}_total_volume"] / 1_000_000
-        )
-        grouped_df[f"{energy_type}_percentage"] = (
-            grouped_df[f"{energy_type}_total_volume"] / regions_df["total_volume"]
-        ) * 100
-        regions_df = pd.merge(regions_df, grouped_df, on="region", how="left")
-
-    return regions_df
+    volume_by_type.columns = volume_by_type.columns.astype(str)
+    return regional_statistics_from_volumes(volume_by_type)
 
 
-
-def format_volume(number):
+def regional_statistics_from_volumes(volume_by_type):
     """
-    Format the volume numbers to a readable format using 'k' for thousands and 'M' for millions.
-    Appends the Euro symbol at the end.
+    Builds the regional statistics table from the total volume of each region and energy type.
 
     Args:
-    number (float or int): The number to format
+        volume_by_type (pd.DataFrame): Total volume sold indexed by region, with one column per
+                                       energy type and NaN where a region has no rows for a type.
 
     Returns:
-    str: The formatted string
+        pd.DataFrame: The table produced by `compute_regional_energy_statistics`, with
+                      percentages computed against the total volume of the same region.
     """
-    if abs(number) >= 1_000_000:  # Check for millions
-        return f"{number/1_000_000:.2f} M€"
-    elif abs(number) >= 1_000:  # Check for thousands
-        return f"{number/1_000:.2f} k€"
-    else:
-        return f"{number:.2f}€"
-
+    total_volume = volume_by_type.sum(axis=1).to_numpy()
+    columns = {
+        "region": volume_by_type.index.to_numpy(),
+        "total_volume": total_volume,
+        "total_volume_millions": total_volume / 1_000_000,
+    }
+    for energy_type in volume_by_type.columns:
+        energy_volume = volume_by_type[energy_type].to_numpy(dtype="float64")
+        columns[f"{energy_type}_total_volume"] = energy_volume
+        columns[f"{energy_type}_total_volume_millions"] = energy_volume / 1_000_000
+        columns[f"{energy_type}_percentage"] = (energy_volume / total_volume) * 100
+
+    return pd.DataFrame(columns)
 
-def format_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Format the dataframe columns: append a Euro sign for columns ending with "volume"
-    and a percentage sign for columns ending with "percentage".
-
-    Args:
-    df (pd.DataFrame): The input DataFrame
-
-    Returns:
-    pd.DataFrame: The formatted DataFrame
-    """
-    formatted_df = df.copy()
-
-    # Drop columns ending with "_millions"
-    cols_to_drop = [col for col in df.columns if col.endswith("_millions")]
-    formatted_df = formatted_df.drop(cols_to_drop, axis=1)
-
-    # Sort by total_volume
-    formatted_df = formatted_df.sort_values(
-        by="total_volume", ascending=False
-    ).reset_index(drop=True)
-
-    # Iterate through each column in the dataframe
-    for col in formatted_df.columns:
-        if col.endswith("_total_volume") or col == "total_volume":
-            # If column ends with "_total_volume" or is "total_volume", apply the format_volume function
-            formatted_df[col] = formatted_df[col].apply(format_volume)
-            # Rename the column to remove the suffix
-            formatted_df.rename(
-                columns={col: col.replace("_total_volume", "")}, inplace=True
-            )
-        elif col.endswith("_percentage"):
-            # If column ends with "_percentage", append percentage sign to each value
-            formatted_df[col] = formatted_df[col].apply(lambda x: f"{x:.2f}%")
-            # Rename the column to replace the suffix with ' %'
-            formatted_df.rename(
-                columns={col: col.replace("_percentage", " %")}, inplace=True
-            )
-
-    return formatted_df
\ No newline at end of file
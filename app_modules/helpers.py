@@ -1,5 +1,18 @@
 import streamlit as st
 
+LOGO_PATH = "img/Efrei-logo.jpeg"
+
+
+@st.cache_resource
+def load_logo():
+    """Opens the Efrei logo once per process. PIL is only imported on the first call."""
+    from PIL import Image
+
+    image = Image.open(LOGO_PATH)
+    image.load()
+    return image
+
+
 def adjust_selectbox_position():
     """Adjusts the positioning of the selectbox by applying custom CSS."""
     st.markdown(
@@ -1,50 +1,126 @@
-from streamlit_folium import st_folium
-import folium
+import copy
+import json
+import os
+
+import pandas as pd
 from app_modules.colors import ENERGY_TYPE_COLOR_GRADIENTS
+from app_modules.timing import span
 import streamlit as st
 
+GEOJSON_PATH = "data/france_regions.geojson"
+MAP_ZOOM = 5
 
-def display_map(regions_df, energy_type, start_date, end_date, key):
-    """Displays a map visualization for the given energy_type and date range."""
+# Simplified copies of GEOJSON_PATH written by preprocess_data/simplify_geojson.py, from the
+# coarsest to the finest. Tolerances are in degrees; each level stays under a pixel of error
+# up to its max_zoom.
+GEOMETRY_LEVELS = {
+    "low": {"tolerance": 0.02, "precision": 2, "max_zoom": 5},
+    "medium": {"tolerance": 0.005, "precision": 3, "max_zoom": 7},
+    "high": {"tolerance": 0.001, "precision": 4, "max_zoom": 9},
+}
 
-    # Initializing and configuring the map.
-    map = initialize_map()
-    select_map_type(energy_type)
 
-    # Setting column names and creating choropleth layer.
-    (
-        column_to_display_as_color,
-        total_volume_per_energy,
-        percentage_per_energy,
-    ) = configure_map_settings(energy_type)
-    choropleth = create_choropleth(regions_df, column_to_display_as_color, energy_type)
-    choropleth.geojson.add_to(map)
+def display_map(regions_df, energy_type, start_date, end_date, cache_key, key):
+    """
+    Displays a map visualization for the given energy_type and date range. `cache_key` holds the
+    date range and the version token of its data, under which the tooltips are memoized.
+    """
+    with span("map_build"):
+        # Initializing and configuring the map.
+        map = initialize_map()
+        select_map_type(energy_type)
+        geometry_path = select_geometry_path(MAP_ZOOM)
 
-    # Updating feature properties and attaching tooltips.
-    update_tooltip(
-        choropleth,
-        regions_df,
-        energy_type,
-        start_date,
-        end_date,
-        total_volume_per_energy,
-        percentage_per_energy,
-    )
-    attach_tooltip(choropleth, energy_type)
+        # Setting column names and creating choropleth layer.
+        (
+            column_to_display_as_color,
+            total_volume_per_energy,
+            percentage_per_energy,
+        ) = configure_map_settings(energy_type)
+        choropleth = create_choropleth(
+            regions_df, column_to_display_as_color, energy_type, geometry_path
+        )
+        choropleth.geojson.add_to(map)
+
+        # Updating feature properties and attaching tooltips.
+        update_tooltip(
+            choropleth,
+            regions_df,
+            energy_type,
+            start_date,
+            end_date,
+            total_volume_per_energy,
+            percentage_per_energy,
+            cache_key,
+        )
+        attach_tooltip(choropleth, energy_type)
 
     # Rendering the map in Streamlit.
     render_streamlit_map(map, key)
 
 
+def geometry_level_path(level):
+    """Returns the path of the simplified regions GeoJSON of a level."""
+    root, extension = os.path.splitext(GEOJSON_PATH)
+    return f"{root}_{level}{extension}"
+
+
+def select_geometry_path(zoom):
+    """
+    Returns the path of the coarsest simplified GeoJSON precise enough for the zoom, or of the
+    full resolution GeoJSON when no such level has been generated.
+    """
+    for level, settings in GEOMETRY_LEVELS.items():
+        path = geometry_level_path(level)
+        if settings["max_zoom"] >= zoom and os.path.exists(path):
+            return path
+    return GEOJSON_PATH
+
+
+@st.cache_resource
+def load_region_geometries(path=GEOJSON_PATH):
+    """
+    Parses the regions GeoJSON once per process. The returned object is shared between sessions
+    and must not be mutated; use `copy_feature_properties` before updating feature properties.
+    """
+    with open(path, encoding="utf-8") as geojson_file:
+        return json.load(geojson_file)
+
+
+def copy_feature_properties(geojson):
+    """
+    Copies the features of a GeoJSON and their properties, sharing the geometries.
+    Returns a FeatureCollection whose feature properties can be updated for a single render.
+    """
+    return {
+        **geojson,
+        "features": [
+            {**feature, "properties": dict(feature["properties"])}
+            for feature in geojson["features"]
+        ],
+    }
+
+
 def initialize_map():
-    """Initializes the map with specified settings. Returns a folium Map object."""
+    """
+    Returns a private copy of the cached base map. A copy is needed since layers are added to
+    the map and st_folium renames its elements when rendering it.
+    """
+    return copy.deepcopy(load_base_map())
+
+
+@st.cache_resource
+def load_base_map():
+    """Builds the base map once per process. Returns a folium Map object shared between sessions."""
+    import folium
+
     tiles = "CartoDB dark_matter"
     # tiles= 'https://tiles.stadiamaps.com/tiles/alidade_smooth_dark/{z}/{x}/{y}{r}.png'
     return folium.Map(
         location=[46.603354, 3],
         scrollWheelZoom=False,
         zoom_control=False,
-        zoom_start=5,
+        zoom_start=MAP_ZOOM,
         tiles=tiles,
         attr="",
     )
@@ -63,6 +139,18 @@ def select_map_type(energy_type):
 
 def configure_map_settings(energy_type):
     """Configures settings and prepares columns for map visualization based on the selected energy type."""
+    total_volume_per_energy, percentage_per_energy = tooltip_columns(energy_type)
+    column_to_display_as_color = (
+        total_volume_per_energy
+        if energy_type == "All Renewables"
+        or st.session_state.get("map_type", "") == "Volume Sold"
+        else percentage_per_energy
+    )
+    return column_to_display_as_color, total_volume_per_energy, percentage_per_energy
+
+
+def tooltip_columns(energy_type):
+    """Returns the volume and percentage columns shown in the tooltips of an energy type's map."""
     total_volume_per_energy = (
         f"{energy_type}_total_volume"
         if energy_type != "All Renewables"
@@ -71,19 +159,17 @@ def configure_map_settings(energy_type):
     percentage_per_energy = (
         f"{energy_type}_percentage" if energy_type != "All Renewables" else ""
     )
-    column_to_display_as_color = (
-        total_volume_per_energy
-        if energy_type == "All Renewables"
-        or st.session_state.get("map_type", "") == "Volume Sold"
-        else percentage_per_energy
-    )
-    return column_to_display_as_color, total_volume_per_energy, percentage_per_energy
+    return total_volume_per_energy, percentage_per_energy
 
 
-def create_choropleth(regions_df, column_to_display_as_color, energy_type):
+def create_choropleth(
+    regions_df, column_to_display_as_color, energy_type, geometry_path=GEOJSON_PATH
+):
     """Creates a choropleth layer for the map visualization."""
+    import folium
+
     return folium.Choropleth(
-        geo_data="data/france_regions.geojson",
+        geo_data=copy_feature_properties(load_region_geometries(geometry_path)),
         data=regions_df,
         columns=["region", column_to_display_as_color],
         key_on="feature.properties.nom",
@@ -96,6 +182,20 @@ def create_choropleth(regions_df, column_to_display_as_color, energy_type):
     )
 
 
+def no_data_properties(energy_type, start_date, end_date):
+    """
+    Returns the tooltip properties of a region without rows for the energy type. They hold every
+    field of `attach_tooltip`, since folium checks the tooltip fields against the first feature.
+    """
+    properties = {
+        "total_volume": "Total: No data",
+        "period": f"From {start_date.strftime('%Y-%m')} to {end_date.strftime('%Y-%m')}",
+    }
+    if energy_type != "All Renewables":
+        properties["percentage"] = f"{energy_type}: No data"
+    return properties
+
+
 def update_tooltip(
     choropleth,
     regions_df,
@@ -104,36 +204,85 @@ def update_tooltip(
     end_date,
     total_volume_per_energy,
     percentage_per_energy,
+    cache_key,
 ):
     """Updates features of the choropleth layer based on the provided data."""
+    tooltip_properties = build_tooltip_properties(
+        regions_df,
+        energy_type,
+        start_date,
+        end_date,
+        total_volume_per_energy,
+        percentage_per_energy,
+        tuple(cache_key),
+    )
+    no_data = no_data_properties(energy_type, start_date, end_date)
     for feature in choropleth.geojson.data["features"]:
         region_name = feature["properties"]["nom"]
-        region = regions_df[regions_df["region"] == region_name]
-
-        # Update properties based on availability of data.
-        if region.empty:
-            feature["properties"].update(
-                {"total_volume": "Total: No data", "avg_volume": "Average: No data"}
-            )
-        else:
-            feature["properties"][
-                "period"
-            ] = f"From {start_date.strftime('%Y-%m')} to {end_date.strftime('%Y-%m')}"
-            if energy_type == "All Renewables":
-                feature["properties"][
-                    "total_volume"
-                ] = f"Total Sold: {region[total_volume_per_energy].iloc[0]:.1f} Millions €"
-            else:
-                feature["properties"][
-                    "total_volume"
-                ] = f"Total Sold: {int(region[total_volume_per_energy].iloc[0]): ,} €"
-                feature["properties"][
-                    "percentage"
-                ] = f"{energy_type}: {region[percentage_per_energy].iloc[0]: .0f}%"
+        feature["properties"].update(tooltip_properties.get(region_name, no_data))
+
+
+def warm_tooltip_properties(regions_df, energy_type, start_date, end_date, cache_key):
+    """
+    Computes the tooltip properties of an energy type's map ahead of its first display, under the
+    same cache entry as `display_map`.
+    """
+    total_volume_per_energy, percentage_per_energy = tooltip_columns(energy_type)
+    build_tooltip_properties(
+        regions_df,
+        energy_type,
+        start_date,
+        end_date,
+        total_volume_per_energy,
+        percentage_per_energy,
+        tuple(cache_key),
+    )
+
+
+@st.cache_data(max_entries=256)
+def build_tooltip_properties(
+    _regions_df,
+    energy_type,
+    start_date,
+    end_date,
+    total_volume_per_energy,
+    percentage_per_energy,
+    cache_key,
+):
+    """
+    Formats the tooltip properties of all regions at once. Returns a dict keyed by region name.
+    Memoized on the selection and `cache_key`, the version token of the regional data, instead
+    of hashing the regional DataFrame on every call.
+    """
+    # Regions without rows for the energy type get the same properties as missing regions.
+    regions_df = _regions_df[_regions_df[total_volume_per_energy].notna()]
+    volumes = regions_df[total_volume_per_energy]
+
+    if energy_type == "All Renewables":
+        tooltips = pd.DataFrame(
+            {"total_volume": "Total Sold: " + volumes.map("{:.1f}".format) + " Millions €"}
+        )
+    else:
+        percentages = regions_df[percentage_per_energy]
+        tooltips = pd.DataFrame(
+            {
+                "total_volume": "Total Sold: "
+                + volumes.map(lambda volume: f"{int(volume): ,}")
+                + " €",
+                "percentage": f"{energy_type}: " + percentages.map("{: .0f}".format) + "%",
+            }
+        )
+    tooltips["period"] = (
+        f"From {start_date.strftime('%Y-%m')} to {end_date.strftime('%Y-%m')}"
+    )
+    tooltips.index = regions_df["region"].astype(str)
+    return tooltips.to_dict("index")
 
 
 def attach_tooltip(choropleth, energy_type):
     """Attaches tooltip to the choropleth layer."""
+    import folium
+
     fields = (
         ["nom", "total_volume", "period"]
         if energy_type == "All Renewables"
@@ -147,7 +296,10 @@ def attach_tooltip(choropleth, energy_type):
 
 def render_streamlit_map(map, key):
     """Renders the map visualization in the Streamlit app."""
-    st_map = st_folium(map, height=350, key=key, use_container_width=True, zoom=5)
+    from streamlit_folium import st_folium
+
+    with span("st_folium"):
+        st_map = st_folium(map, height=350, key=key, use_container_width=True, zoom=MAP_ZOOM)
     if "region" not in st.session_state:
         st.session_state["region"] = "All Regions"
 
@@ -0,0 +1,239 @@
+"""
+This module is the headless query layer of the dashboard.
+
+Every number the dashboard shows is computed here from the aggregate cube or its rollups and a
+`Selection` (date range, region, energy type and time interval), as plain DataFrames and Series.
+The module does not import Streamlit, so batch exports, benchmarks and load tests can use it
+directly; the Streamlit pages only pass the user's selection in and draw what comes out:
+
+    python -m app_modules.query --start 2021-01 --end 2021-12 --energy-type Solar
+"""
+
+import argparse
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from app_modules.cube import compute_regional_energy_statistics_from_cube, cube_to_dataframe
+from app_modules.rollups import rollup_series
+from app_modules.timing import timed
+
+
+class Selection(NamedTuple):
+    """What the user selected in the dashboard."""
+
+    start_date: object  # datetime, first day included.
+    end_date: object  # datetime, last day included.
+    region: str = "All Regions"
+    energy_type: str = ""  # An empty string selects all energy types.
+    time_interval: str = "Yearly"  # 'Yearly' or 'Monthly'.
+
+
+# -----------------------------------------------
+# --            Selections of the cube          --
+# -----------------------------------------------
+
+
+@timed()
+def regional_statistics(cube, selection):
+    """
+    Returns the per-region totals and energy type shares of the selected date range, for all
+    regions and energy types; see `compute_regional_energy_statistics_from_cube`.
+    """
+    return compute_regional_energy_statistics_from_cube(
+        cube, selection.start_date, selection.end_date
+    )
+
+
+@timed()
+def selection_frame(cube, selection):
+    """
+    Returns the monthly volumes of the selection, one row per month and energy type, with
+    'date', 'energy_type' and 'total_volume_sold' columns.
+    """
+    return cube_to_dataframe(
+        cube, selection.start_date, selection.end_date, selection.region, selection.energy_type
+    )
+
+
+# -----------------------------------------------
+# --          Chart series of a selection        --
+# -----------------------------------------------
+
+
+def energy_type_categorical(rollups, energy_idx):
+    """Returns the energy types at positions `energy_idx`, coded with the dictionary of the rollups."""
+    return pd.Categorical.from_codes(
+        energy_idx, dtype=pd.CategoricalDtype(rollups.energy_types)
+    )
+
+
+def selection_series(rollups, selection, grain):
+    """
+    Reads the series of the selected region and energy types over the selected date range at a
+    grain ('month', 'year', 'season' or 'total'); see `rollup_series`.
+    """
+    return rollup_series(
+        rollups,
+        selection.start_date,
+        selection.end_date,
+        selection.region,
+        selection.energy_type,
+        grain,
+    )
+
+
+def volume_by_energy_type(rollups, selection):
+    """
+    Function to compute the total volume sold per energy type of the selection.
+
+    Args:
+        rollups (Rollups): The rollups of the dataset.
+        selection (Selection): The date range, region and energy type.
+
+    Returns:
+        pd.Series: The total volume sold, indexed by energy type in dictionary order, for the
+                   energy types having rows in the selection.
+    """
+    _, energy_idx, volume, count = selection_series(rollups, selection, "total")
+    observed = count[0] > 0
+    return pd.Series(
+        volume[0][observed],
+        index=pd.CategoricalIndex(
+            energy_type_categorical(rollups, energy_idx[observed]), name="energy_type"
+        ),
+        name="total_volume_sold",
+    )
+
+
+def volume_over_time(rollups, selection):
+    """
+    Function to read the total volume sold per energy type and time period of the selection.
+
+    Args:
+        rollups (Rollups): The rollups of the dataset.
+        selection (Selection): The date range, region, energy type and time interval; the time
+                               interval can be 'Monthly' or 'Yearly'.
+
+    Returns:
+        tuple: The periods (years or first days of months), the energy types of the columns, the
+               (period x energy type) volume and row count arrays, and the name of the period
+               axis ('year' or 'date'). A period without rows for an energy type has a zero count.
+    """
+    if selection.time_interval == "Yearly":
+        x_col, grain = "year", "year"
+    else:
+        x_col, grain = "date", "month"
+    periods, energy_idx, volume, count = selection_series(rollups, selection, grain)
+    return periods, rollups.energy_types[energy_idx], volume, count, x_col
+
+
+def season_percentages(rollups, selection):
+    """
+    Computes the percentage of the volume of the selection sold in each season.
+
+    Args:
+        rollups (Rollups): The rollups of the dataset.
+        selection (Selection): The date range, region and energy type.
+
+    Returns:
+        pd.DataFrame: The 'season' and 'percentage_of_total' columns, for the seasons having rows
+                      in the selection, in calendar order from Winter to Autumn.
+    """
+    seasons, _, volume, count = selection_series(rollups, selection, "season")
+    season_volume = volume.sum(axis=1)
+    present = count.sum(axis=1) > 0
+    return pd.DataFrame(
+        {
+            "season": seasons[present].tolist(),
+            "percentage_of_total": season_volume[present] / season_volume.sum() * 100,
+        }
+    )
+
+
+# -----------------------------------------------
+# --            Rankings of the regions         --
+# -----------------------------------------------
+
+
+def rank_regions(regions_df, energy_type=""):
+    """
+    Ranks the regional statistics by volume sold, for the regional tables.
+
+    Args:
+        regions_df (pd.DataFrame): The regional statistics, from `regional_statistics`.
+        energy_type (str): The energy type to rank by, or an empty string for the total volume.
+
+    Returns:
+        pd.DataFrame: The statistics without the '_millions' columns, sorted by decreasing volume.
+                      With an energy type, only its columns and the total volume are kept.
+    """
+    columns = [column for column in regions_df.columns if not column.endswith("_millions")]
+    sort_column = "total_volume"
+    if energy_type != "":
+        columns = (
+            ["region"]
+            + [column for column in columns if column.startswith(energy_type)]
+            + ["total_volume"]
+        )
+        sort_column = f"{energy_type}_total_volume"
+    return (
+        regions_df[columns]
+        .sort_values(by=sort_column, ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def top_regions(regions_df, energy_type, n):
+    """
+    Keeps the `n` regions that sold the most of an energy type and groups the others.
+
+    Args:
+        regions_df (pd.DataFrame): The regional statistics, from `regional_statistics`.
+        energy_type (str): The energy type.
+        n (int): The number of regions kept separately.
+
+    Returns:
+        tuple: The 'region' and volume columns of the top `n` regions, followed by an
+               'Other regions' row when there are more regions, and the top `n` regions alone.
+    """
+    col_name = energy_type + "_total_volume"
+    if col_name not in regions_df.columns:
+        raise ValueError(f"{col_name} does not exist in the DataFrame")
+
+    sorted_df = regions_df.sort_values(by=col_name, ascending=False)
+    top_n_df = sorted_df.head(n)
+
+    if len(regions_df) > n:
+        other_df = pd.DataFrame(
+            {
+                "region": ["Other regions"],
+                col_name: [sorted_df.iloc[n:][col_name].sum()],
+            }
+        )
+        return pd.concat([top_n_df, other_df], ignore_index=True), top_n_df
+    return top_n_df, top_n_df
+
+
+if __name__ == "__main__":
+    from app_modules.snapshot import wait_for_snapshot
+
+    parser = argparse.ArgumentParser(description="Export the regional statistics of a selection.")
+    parser.add_argument("--start", required=True, help="First month, as YYYY-MM.")
+    parser.add_argument("--end", required=True, help="Last month, as YYYY-MM.")
+    parser.add_argument("--energy-type", default="", help="Energy type to rank the regions by.")
+    parser.add_argument("--output", help="CSV file to write instead of printing the table.")
+    args = parser.parse_args()
+
+    snapshot = wait_for_snapshot()
+    selection = Selection(
+        start_date=pd.Period(args.start, freq="M").start_time,
+        end_date=pd.Period(args.end, freq="M").end_time.normalize(),
+        energy_type=args.energy_type,
+    )
+    table = rank_regions(regional_statistics(snapshot.cube, selection), selection.energy_type)
+    if args.output:
+        table.to_csv(args.output, index=False)
+    else:
+        print(table.to_string(index=False))
@@ -0,0 +1,128 @@
+"""
+This module builds the rollups the charts read: the volume sold by every (region, energy type)
+series at month, year and season grain, including an 'All Regions' level.
+
+The rollups are derived from the aggregate cube at load time as prefix sums along the month axis:
+one for the monthly series and one per season. The total of any date range at any grain is then
+the difference of two slices, so switching the time interval or the date range of a chart reads
+a few values instead of regrouping rows.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from app_modules.cube import cube_month_range
+from app_modules.dataset import SEASONS, SEASONS_MAPPING
+from app_modules.timing import timed
+
+ALL_REGIONS = "All Regions"
+
+
+class Rollups(NamedTuple):
+    """Prefix sums of the series of the cube. Series arrays have shape (month, region, energy type)."""
+
+    months: np.ndarray  # First day of each month, as datetime64, as in the cube.
+    years: np.ndarray  # Year of each year present in `months`.
+    year_starts: np.ndarray  # Position of the first month of each year, then len(months).
+    regions: np.ndarray  # 'All Regions' followed by the regions of the cube.
+    energy_types: np.ndarray  # Energy types, in the order of their dictionary.
+    volume: np.ndarray  # Monthly volume sold.
+    count: np.ndarray  # Monthly number of dataset rows.
+    volume_cumsum: np.ndarray  # Cumulative volume, with a leading zero slice.
+    count_cumsum: np.ndarray  # Cumulative row count, with a leading zero slice.
+    season_volume_cumsum: np.ndarray  # Cumulative volume per season, shape (month + 1, season, ...).
+    season_count_cumsum: np.ndarray  # Cumulative row count per season.
+
+
+@timed()
+def build_rollups(cube):
+    """
+    Builds the rollups of an aggregate cube.
+
+    Args:
+        cube (AggregateCube): The aggregate cube of the dataset.
+
+    Returns:
+        Rollups: The rollups, as read-only arrays since they are shared by every session.
+    """
+    months = pd.DatetimeIndex(cube.months)
+    volume = np.concatenate([cube.volume.sum(axis=1, keepdims=True), cube.volume], axis=1)
+    count = np.concatenate([cube.count.sum(axis=1, keepdims=True), cube.count], axis=1)
+
+    years, year_starts = np.unique(months.year.to_numpy(), return_index=True)
+    season_idx = np.array([SEASONS.index(SEASONS_MAPPING[month]) for month in months.month])
+    # One-hot (month x season) weights spreading each month's series into its season.
+    in_season = (season_idx[:, None] == np.arange(len(SEASONS))).astype(volume.dtype)
+
+    def prefix_sums(values):
+        zeros = np.zeros((1,) + values.shape[1:], dtype=values.dtype)
+        return np.concatenate([zeros, values.cumsum(axis=0)])
+
+    rollups = Rollups(
+        months=cube.months,
+        years=years,
+        year_starts=np.append(year_starts, len(months)),
+        regions=np.concatenate([[ALL_REGIONS], cube.regions]),
+        energy_types=cube.energy_types,
+        volume=volume,
+        count=count,
+        volume_cumsum=prefix_sums(volume),
+        count_cumsum=prefix_sums(count),
+        season_volume_cumsum=prefix_sums(in_season[:, :, None, None] * volume[:, None]),
+        season_count_cumsum=prefix_sums(
+            in_season[:, :, None, None].astype(count.dtype) * count[:, None]
+        ),
+    )
+    for array in rollups:
+        array.setflags(write=False)
+    return rollups
+
+
+def rollup_series(rollups, start_date, end_date, region, energy_type, grain):
+    """
+    Reads the series of a region and energy types over a date range at a grain.
+
+    Args:
+        rollups (Rollups): The rollups of the dataset.
+        start_date (datetime): The start date of the range.
+        end_date (datetime): The end date of the range.
+        region (str): The region, or 'All Regions'.
+        energy_type (str): The energy type, or an empty string for all of them.
+        grain (str): 'month', 'year', 'season' or 'total'.
+
+    Returns:
+        tuple: The period labels (first days of months, years, season names or None), the
+               positions of the energy types in `rollups.energy_types`, and the (period x energy
+               type) volume and row count arrays.
+    """
+    start, stop = cube_month_range(rollups, start_date, end_date)
+    energy_idx = np.arange(len(rollups.energy_types))
+    if energy_type != "":
+        energy_idx = np.flatnonzero(rollups.energy_types == energy_type)
+    # A region outside the dictionary has no rows: its series are read empty, then zero-filled.
+    region_pos = np.flatnonzero(rollups.regions == region)
+    cells = (slice(None), region_pos[0] if len(region_pos) else slice(0, 0), energy_idx)
+
+    if grain == "month":
+        periods = rollups.months[start:stop]
+        volume = rollups.volume[start:stop][cells]
+        count = rollups.count[start:stop][cells]
+    elif grain == "year":
+        bounds = np.unique(np.clip(rollups.year_starts, start, stop))
+        periods = rollups.years[np.searchsorted(rollups.year_starts, bounds[:-1], "right") - 1]
+        volume = np.diff(rollups.volume_cumsum[bounds][cells], axis=0)
+        count = np.diff(rollups.count_cumsum[bounds][cells], axis=0)
+    elif grain == "season":
+        periods = np.array(SEASONS)
+        volume = (rollups.season_volume_cumsum[stop] - rollups.season_volume_cumsum[start])[cells]
+        count = (rollups.season_count_cumsum[stop] - rollups.season_count_cumsum[start])[cells]
+    else:
+        periods = None
+        volume = (rollups.volume_cumsum[stop] - rollups.volume_cumsum[start])[None][cells]
+        count = (rollups.count_cumsum[stop] - rollups.count_cumsum[start])[None][cells]
+    if not len(region_pos):
+        volume = np.zeros((len(volume), len(energy_idx)))
+        count = np.zeros((len(count), len(energy_idx)), dtype=rollups.count.dtype)
+    return periods, energy_idx, volume, count
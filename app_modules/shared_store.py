@@ -0,0 +1,176 @@
+"""
+This module stores a loaded dataset and its aggregate cube as memory-mappable NumPy files.
+
+Each dataset version gets its own directory under `data/shared_store`, holding one `.npy` file
+per numeric column, categorical codes column and cube array, plus a JSON file with the category
+labels. Every Streamlit process opening the same version maps the same files, so the operating
+system keeps a single page-cache copy of the data instead of one pandas copy per process.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app_modules.cube import AggregateCube
+
+STORE_DIR = "data/shared_store"
+METADATA_FILE = "metadata.json"
+# Temporary directories not modified for this long were left by a writer that died.
+STALE_WRITE_SECONDS = 600
+
+# Columns stored as raw values, as categorical codes and as period ordinals.
+VALUE_COLUMNS = ["date", "total_volume_sold"]
+CATEGORICAL_COLUMNS = ["region", "energy_type", "season"]
+PERIOD_COLUMNS = {"month": "M", "year": "Y"}
+
+
+def version_dir(version, store_dir=STORE_DIR):
+    """Returns the directory holding the files of a dataset version."""
+    return os.path.join(store_dir, version)
+
+
+def write_shared_store(dataset, cube, version, store_dir=STORE_DIR):
+    """
+    Writes a dataset version and its cube as `.npy` files.
+
+    The files are written to a `.<version>-*` temporary directory that is then renamed, so a
+    process never maps a partly written version. When another process wrote the same version
+    first, its files are kept.
+
+    Args:
+        dataset (pd.DataFrame): The loaded dataset, see `load_dataset`.
+        cube (AggregateCube): The aggregate cube of the dataset.
+        version (str): The dataset version, used as the directory name.
+        store_dir (str): The directory holding all stored versions.
+
+    Returns:
+        str: The directory of the version.
+    """
+    target_dir = version_dir(version, store_dir)
+    if os.path.isdir(target_dir):
+        return target_dir
+    os.makedirs(store_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{version}-", dir=store_dir)
+
+    try:
+        metadata = {"columns": list(dataset.columns), "categories": {}}
+        for column in VALUE_COLUMNS:
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), dataset[column].to_numpy())
+        for column in CATEGORICAL_COLUMNS:
+            values = dataset[column].array
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), values.codes)
+            metadata["categories"][column] = {
+                "labels": values.categories.tolist(),
+                "ordered": bool(values.ordered),
+            }
+        for column in PERIOD_COLUMNS:
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), dataset[column].array.asi8)
+        for field in ("months", "volume", "count", "volume_cumsum", "count_cumsum"):
+            np.save(os.path.join(tmp_dir, f"cube_{field}.npy"), getattr(cube, field))
+        metadata["cube"] = {
+            "regions": cube.regions.tolist(),
+            "energy_types": cube.energy_types.tolist(),
+        }
+        with open(os.path.join(tmp_dir, METADATA_FILE), "w", encoding="utf-8") as metadata_file:
+            json.dump(metadata, metadata_file, ensure_ascii=False)
+    except BaseException:
+        # A failed write, e.g. a full disk, removes its partial files; see remove_other_versions
+        # for the writes of processes that died.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    try:
+        os.rename(tmp_dir, target_dir)
+    except OSError:
+        # Another process renamed its copy of the same version first.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return target_dir
+
+
+def open_shared_store(version, store_dir=STORE_DIR):
+    """
+    Maps a stored dataset version without reading it into memory.
+
+    Args:
+        version (str): The dataset version.
+        store_dir (str): The directory holding all stored versions.
+
+    Returns:
+        tuple: The dataset and its AggregateCube, both backed by read-only memory maps, or None
+               when the version is not stored.
+    """
+    source_dir = version_dir(version, store_dir)
+    metadata_path = os.path.join(source_dir, METADATA_FILE)
+    if not os.path.exists(metadata_path):
+        return None
+    with open(metadata_path, encoding="utf-8") as metadata_file:
+        metadata = json.load(metadata_file)
+
+    def load(name):
+        # Plain ndarray views of the maps, so pandas treats them as any other array.
+        path = os.path.join(source_dir, f"{name}.npy")
+        return np.load(path, mmap_mode="r").view(np.ndarray)
+
+    columns = {column: load(column) for column in VALUE_COLUMNS}
+    for column in CATEGORICAL_COLUMNS:
+        categories = metadata["categories"][column]
+        dtype = pd.CategoricalDtype(categories["labels"], ordered=categories["ordered"])
+        # Without validation the codes are wrapped as they are instead of being copied.
+        columns[column] = pd.Categorical.from_codes(load(column), dtype=dtype, validate=False)
+    for column, freq in PERIOD_COLUMNS.items():
+        columns[column] = pd.arrays.PeriodArray(load(column), dtype=pd.PeriodDtype(freq))
+    dataset = pd.DataFrame(
+        {column: columns[column] for column in metadata["columns"]}, copy=False
+    )
+
+    cube = AggregateCube(
+        months=load("cube_months"),
+        regions=np.asarray(metadata["cube"]["regions"], dtype=str),
+        energy_types=np.asarray(metadata["cube"]["energy_types"], dtype=str),
+        volume=load("cube_volume"),
+        count=load("cube_count"),
+        volume_cumsum=load("cube_volume_cumsum"),
+        count_cumsum=load("cube_count_cumsum"),
+    )
+    for array in (cube.regions, cube.energy_types):
+        array.setflags(write=False)
+    return dataset, cube
+
+
+def remove_other_versions(version, store_dir=STORE_DIR, stale_seconds=STALE_WRITE_SECONDS):
+    """
+    Deletes the stored versions other than `version` and the one written before it, and the
+    temporary directories of writes that have not been modified for `stale_seconds`, left behind
+    by processes that died while writing.
+
+    The previous version is kept until the next swap: another process may have read its manifest
+    and still be opening its files. Processes still mapping a deleted version keep reading it
+    until they unmap it.
+    """
+    if not os.path.isdir(store_dir):
+        return
+    now = time.time()
+    other_versions = []
+    for name in os.listdir(store_dir):
+        path = os.path.join(store_dir, name)
+        if name.startswith("."):
+            # A recent temporary directory may be a write in progress in another process.
+            try:
+                stale = now - os.path.getmtime(path) > stale_seconds
+            except OSError:
+                continue
+            if stale:
+                shutil.rmtree(path, ignore_errors=True)
+        elif name != version:
+            try:
+                other_versions.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+    # The most recently written of the other versions is the previous one.
+    for _, path in sorted(other_versions)[:-1]:
+        shutil.rmtree(path, ignore_errors=True)
@@ -1,18 +1,20 @@
 
 
-from PIL import Image
-
 import streamlit as st
-import pandas as pd
 import datetime
 import calendar
 
+import pandas as pd
+
+from app_modules.helpers import load_logo
+from app_modules.timing import ROLLING_WINDOW, rolling_percentiles
+
 def display_date_filter_sidebar(dataframe):
     """
     Display a sidebar with interactive sliders allowing users to filter the displayed data based on date ranges.
     
     Args:
-        dataframe (pd.DataFrame): The input DataFrame containing the data to be filtered.
+        dataframe (pd.DataFrame): The shared, read-only dataset with its 'month' and 'year' period columns.
 
     Returns:
         tuple: A tuple containing the start_date and end_date selected by the user.
@@ -23,13 +25,12 @@ def display_date_filter_sidebar(dataframe):
     # Providing a dropdown select box for the user to choose the date interval type (Month or Year).
     interval_type = st.sidebar.selectbox("Select Interval type (Month or Year)", ("Month", "Year"))
 
-    # Updating the 'interval' column in the DataFrame based on the selected interval type
-    dataframe['interval'] = dataframe['date'].dt.to_period('M') if interval_type == "Month" else dataframe['date'].dt.to_period('Y')
-
-    # Retrieving unique intervals for slider creation
-    unique_intervals = sorted(dataframe['interval'].unique().astype(str))
-    start_interval = pd.to_datetime(unique_intervals[0]).to_pydatetime()
-    end_interval = pd.to_datetime(unique_intervals[-1]).to_pydatetime()
+    # Reading the first and last intervals from the precomputed period columns; the dataset is
+    # sorted by date and shared between sessions, so it is only read here.
+    interval_column = "month" if interval_type == "Month" else "year"
+    first_interval, last_interval = dataframe[interval_column].iloc[[0, -1]]
+    start_interval = first_interval.start_time.to_pydatetime()
+    end_interval = last_interval.start_time.to_pydatetime()
 
     # Creating sliders in the sidebar, enabling users to select the date range based on the selected interval type
     if interval_type == "Year":
@@ -68,8 +69,52 @@ def display_date_filter_sidebar(dataframe):
         st.subheader('#datavz2023efrei')
         st.subheader('Supervised by [MATHEW Mano Joseph](https://www.linkedin.com/in/manomathew/)')
 
-        image = Image.open('img/Efrei-logo.jpeg')
-        st.image(image, width=200)
+        st.image(load_logo(), width=200)
 
     return selected_start_date, selected_end_date
 
+
+def default_date_range(dataframe):
+    """
+    Returns the date range the sidebar selects before the user moves its slider: from the first day
+    of the first month to the last day of the last month of the dataset.
+
+    Args:
+        dataframe (pd.DataFrame): The shared, read-only dataset with its 'month' period column.
+
+    Returns:
+        tuple: The start_date and end_date, as the sidebar returns them.
+    """
+    first_month, last_month = dataframe["month"].iloc[[0, -1]]
+    return (
+        first_month.start_time.to_pydatetime(),
+        last_month.end_time.normalize().to_pydatetime(),
+    )
+
+
+def display_timing_panel(rerun_timing):
+    """
+    Display a sidebar panel with the time spent in each stage of the rerun, and the median and 95th
+    percentile of each stage over the recent reruns of the server process.
+
+    Args:
+        rerun_timing (dict): The milliseconds spent in each stage, from `finish_rerun`; the panel
+                             is not shown when it is None, i.e. when timing is off.
+    """
+    if rerun_timing is None:
+        return
+    percentiles = rolling_percentiles()
+    with st.sidebar.expander("Performance", expanded=False):
+        st.write("This rerun:")
+        st.dataframe(
+            pd.DataFrame({"stage": list(rerun_timing), "ms": list(rerun_timing.values())}),
+            hide_index=True,
+        )
+        st.write(f"Last {ROLLING_WINDOW} reruns:")
+        st.dataframe(
+            pd.DataFrame(
+                [(stage, *values) for stage, values in percentiles.items()],
+                columns=["stage", "count", "p50 ms", "p95 ms"],
+            ),
+            hide_index=True,
+        )
@@ -0,0 +1,197 @@
+"""
+This module keeps the dataset and its aggregates up to date without restarting the app.
+
+A `SnapshotStore` holds the current `DatasetSnapshot`: the manifest, the dataset and its aggregate
+cube, loaded together and mapped from the shared store that all processes of the app read, and the
+chart rollups derived from the cube. A background thread polls the data files and, when a new
+version appears, loads it off the request path before replacing the snapshot with a single
+reference swap. A rerun reads the snapshot once and uses it throughout, so it always sees a
+consistent dataset, cube and version, even if a swap happens while it runs.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import NamedTuple
+
+import pandas as pd
+
+from app_modules.cube import AggregateCube, build_aggregate_cube
+from app_modules.dataset import (
+    COLUMNAR_PATH,
+    CSV_PATH,
+    build_dataset_manifest,
+    current_dataset_path,
+    dataset_version,
+    has_loaded_columns,
+    load_dataset,
+    manifest_matches,
+    record_dataset_manifest,
+    recorded_dataset_manifest,
+)
+from app_modules.rollups import Rollups, build_rollups
+from app_modules.shared_store import (
+    STORE_DIR,
+    open_shared_store,
+    remove_other_versions,
+    write_shared_store,
+)
+from app_modules.timing import timed
+
+POLL_SECONDS = 10
+# Wait before loading again a dataset that changed while it was loaded, doubled on each attempt.
+RETRY_SECONDS = 0.5
+MAX_RETRY_SECONDS = 10
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetSnapshot(NamedTuple):
+    """A dataset version with everything derived from it."""
+
+    manifest: dict
+    version: str
+    dataset: pd.DataFrame
+    cube: AggregateCube
+    rollups: Rollups
+
+
+@timed()
+def load_snapshot(csv_path=CSV_PATH, columnar_path=COLUMNAR_PATH, store_dir=STORE_DIR):
+    """
+    Maps the dataset currently on disk and its aggregates from the shared store, loading and
+    storing them first when no process has done it yet for this version.
+
+    Returns:
+        DatasetSnapshot: The snapshot, or None when the file changed while it was being loaded,
+                         e.g. during an ingestion, in which case it should be loaded again later.
+    """
+    path = current_dataset_path(csv_path, columnar_path)
+    stat = os.stat(path)
+    manifest = recorded_dataset_manifest(path)
+    dataset = None
+    if manifest is None:
+        # The manifest of a new file is built from the frame that feeds the cube below, so a
+        # cold load reads the file once.
+        dataset = load_dataset(csv_path, columnar_path)
+        manifest = build_dataset_manifest(path, dataset, stat)
+        if not manifest_matches(manifest, current_dataset_path(csv_path, columnar_path)):
+            return None
+        record_dataset_manifest(path, manifest)
+    version = dataset_version(manifest)
+    stored = open_shared_store(version, store_dir)
+    if stored is None:
+        if dataset is None:
+            dataset = load_dataset(csv_path, columnar_path)
+            if not manifest_matches(manifest, current_dataset_path(csv_path, columnar_path)):
+                return None
+        cube = build_aggregate_cube(dataset)
+        try:
+            write_shared_store(dataset, cube, version, store_dir)
+            remove_other_versions(version, store_dir)
+            stored = open_shared_store(version, store_dir)
+        except OSError:
+            # Read-only data directory: this process keeps its own copy.
+            stored = dataset, cube
+    dataset, cube = stored
+    # The rollups are small and quick to derive from the cube, so each process builds its own.
+    return DatasetSnapshot(
+        manifest=manifest,
+        version=version,
+        dataset=dataset,
+        cube=cube,
+        rollups=build_rollups(cube),
+    )
+
+
+def wait_for_snapshot(
+    csv_path=CSV_PATH,
+    columnar_path=COLUMNAR_PATH,
+    store_dir=STORE_DIR,
+    retry_seconds=RETRY_SECONDS,
+):
+    """
+    Loads the snapshot of the dataset on disk, waiting with exponential backoff while the file
+    keeps changing under the load, e.g. during an ingestion.
+
+    Returns:
+        DatasetSnapshot: The snapshot.
+    """
+    while True:
+        snapshot = load_snapshot(csv_path, columnar_path, store_dir)
+        if snapshot is not None:
+            return snapshot
+        logger.info("The dataset changed while it was loaded; retrying in %.1f s", retry_seconds)
+        time.sleep(retry_seconds)
+        retry_seconds = min(retry_seconds * 2, MAX_RETRY_SECONDS)
+
+
+class SnapshotStore:
+    """Serves the current dataset snapshot and reloads it in the background when the data changes."""
+
+    def __init__(
+        self,
+        csv_path=CSV_PATH,
+        columnar_path=COLUMNAR_PATH,
+        store_dir=STORE_DIR,
+        poll_seconds=POLL_SECONDS,
+    ):
+        self.csv_path = csv_path
+        self.columnar_path = columnar_path
+        self.store_dir = store_dir
+        self.poll_seconds = poll_seconds
+        self.reloads = 0
+        self._snapshot = wait_for_snapshot(csv_path, columnar_path, store_dir)
+        self._stopped = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, name="dataset-watcher", daemon=True)
+        self._watcher.start()
+
+    def current(self):
+        """Returns the current snapshot. Read it once per rerun and pass its parts along."""
+        return self._snapshot
+
+    def is_stale(self):
+        """
+        Returns True when the snapshot no longer matches the data on disk, or when its shared
+        dataset was modified by a caller.
+        """
+        snapshot = self._snapshot
+        path = current_dataset_path(self.csv_path, self.columnar_path)
+        try:
+            on_disk = manifest_matches(snapshot.manifest, path)
+        except FileNotFoundError:
+            # The file is being replaced; keep serving the current snapshot.
+            return False
+        return not on_disk or not has_loaded_columns(snapshot.dataset)
+
+    def refresh(self):
+        """
+        Loads the data on disk and swaps it in when the snapshot is stale.
+
+        Returns:
+            bool: Whether a new snapshot was swapped in.
+        """
+        if not self.is_stale():
+            return False
+        snapshot = load_snapshot(self.csv_path, self.columnar_path, self.store_dir)
+        if snapshot is None:
+            return False
+        self._snapshot = snapshot
+        self.reloads += 1
+        return True
+
+    def stop(self):
+        """Stops the background watcher."""
+        self._stopped.set()
+        self._watcher.join()
+
+    def _watch(self):
+        while not self._stopped.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                # A broken or half-written file must not stop the watcher; the current snapshot
+                # stays in use until a loadable version appears.
+                logger.exception("Reloading the dataset failed")
+
@@ -0,0 +1,71 @@
+"""
+This module builds the regional statistics tables of the dashboard.
+
+The tables keep their volume and percentage columns as numbers and leave their display to the
+browser through Streamlit column configuration: volumes are shown in compact form (e.g. 1.2M) and
+percentages with two decimals. The table is sent as a numeric Arrow payload rather than as one
+formatted string per cell, and sorting a column in the browser sorts its values numerically.
+"""
+
+import streamlit as st
+
+from app_modules.query import rank_regions
+
+VOLUME_FORMAT = "compact"
+PERCENTAGE_FORMAT = "%.2f%%"
+
+
+def regional_table_column_config(columns):
+    """
+    Builds the display configuration of the columns of a ranked regional table.
+
+    Args:
+        columns (list): The column names, from `rank_regions`.
+
+    Returns:
+        dict: The column configuration, labelling the energy type columns by energy type and
+              formatting volumes in € and percentages in %.
+    """
+    column_config = {}
+    for column in columns:
+        if column == "total_volume":
+            column_config[column] = st.column_config.NumberColumn(
+                "total_volume (€)", format=VOLUME_FORMAT
+            )
+        elif column.endswith("_total_volume"):
+            column_config[column] = st.column_config.NumberColumn(
+                column.replace("_total_volume", " (€)"), format=VOLUME_FORMAT
+            )
+        elif column.endswith("_percentage"):
+            column_config[column] = st.column_config.NumberColumn(
+                column.replace("_percentage", " %"), format=PERCENTAGE_FORMAT
+            )
+    return column_config
+
+
+def regional_table(regions_df, energy_type=""):
+    """
+    Builds a regional statistics table ranked by volume sold.
+
+    Args:
+        regions_df (pd.DataFrame): The regional statistics, from `regional_statistics`.
+        energy_type (str): The energy type to rank by, or an empty string for the total volume.
+
+    Returns:
+        tuple: The numeric table, see `rank_regions`, and its column configuration.
+    """
+    table = rank_regions(regions_df, energy_type)
+    return table, regional_table_column_config(table.columns)
+
+
+def display_regional_table(regions_df, energy_type="", height=None):
+    """
+    Displays a regional statistics table ranked by volume sold; see `regional_table`.
+
+    Args:
+        regions_df (pd.DataFrame): The regional statistics, from `regional_statistics`.
+        energy_type (str): The energy type to rank by, or an empty string for the total volume.
+        height (int, optional): The height of the table in pixels.
+    """
+    table, column_config = regional_table(regions_df, energy_type)
+    st.dataframe(table, height=height, use_container_width=True, column_config=column_config)
@@ -0,0 +1,164 @@
+"""
+This module times the stages of a rerun: loading the data, aggregating the selection, building
+the map and the figures, and rendering them.
+
+Timing is off unless the DASHBOARD_TIMING environment variable is set to a value other than 0
+when the app starts. When off, `timed` leaves functions undecorated and `span` returns a shared
+no-op context manager, so instrumented code runs as it would without instrumentation. When on,
+each rerun is logged as one JSON line, to stderr or to the file named by DASHBOARD_TIMING_LOG:
+
+    DASHBOARD_TIMING=1 DASHBOARD_TIMING_LOG=timing.jsonl streamlit run app.py
+
+Spans recorded outside a rerun, e.g. by the background reload of the dataset, are logged on their
+own. The module does not import Streamlit; the sidebar draws the collected timings.
+"""
+
+import collections
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+TIMING_VARIABLE = "DASHBOARD_TIMING"
+TIMING_LOG_VARIABLE = "DASHBOARD_TIMING_LOG"
+TIMING_ENABLED = os.environ.get(TIMING_VARIABLE, "") not in ("", "0")
+
+# Number of reruns kept per stage for the rolling percentiles.
+ROLLING_WINDOW = 200
+
+logger = logging.getLogger(__name__)
+
+_NO_SPAN = contextlib.nullcontext()
+# The spans of the rerun running on each script thread.
+_rerun = threading.local()
+_history = collections.defaultdict(lambda: collections.deque(maxlen=ROLLING_WINDOW))
+_history_lock = threading.Lock()
+
+
+def configure_timing_log():
+    """Sends the JSON lines of the module logger to DASHBOARD_TIMING_LOG, or to stderr."""
+    path = os.environ.get(TIMING_LOG_VARIABLE)
+    handler = logging.FileHandler(path) if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def log_event(event):
+    """Writes an event as a JSON line, with the time and the process it happened in."""
+    logger.info(json.dumps({"time": time.time(), "pid": os.getpid(), **event}))
+
+
+class Span:
+    """Times the block it wraps and records it under `name`."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_span(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+def span(name):
+    """
+    Returns a context manager timing its block as the stage `name`:
+
+        with span("st_folium"):
+            st_map = st_folium(...)
+    """
+    if not TIMING_ENABLED:
+        return _NO_SPAN
+    return Span(name)
+
+
+def timed(name=None):
+    """
+    Decorates a function so that each call is timed as the stage `name`, by default the
+    function's name. Returns the function itself when timing is off.
+    """
+
+    def decorate(function):
+        if not TIMING_ENABLED:
+            return function
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with Span(label):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def record_span(name, milliseconds):
+    """Adds a span to the current rerun, or logs it alone when no rerun runs on this thread."""
+    spans = getattr(_rerun, "spans", None)
+    if spans is None:
+        log_event({"event": "span", "stage": name, "ms": milliseconds})
+    else:
+        spans.append((name, milliseconds))
+
+
+def start_rerun():
+    """Starts collecting the spans of a rerun on the current thread."""
+    if TIMING_ENABLED:
+        _rerun.spans = []
+        _rerun.start = time.perf_counter()
+
+
+def finish_rerun():
+    """
+    Stops collecting the spans of the current rerun, logs them and adds them to the rolling
+    history.
+
+    Returns:
+        dict: The milliseconds spent in each stage, in the order they first ran and summed over
+              repeated calls, followed by the whole 'rerun'; None when timing is off. A stage
+              timed within another one is also counted in the outer stage.
+    """
+    spans = getattr(_rerun, "spans", None)
+    if spans is None:
+        return None
+    stages = {}
+    for name, milliseconds in spans:
+        stages[name] = stages.get(name, 0.0) + milliseconds
+    stages["rerun"] = (time.perf_counter() - _rerun.start) * 1000
+    _rerun.spans = None
+
+    with _history_lock:
+        for name, milliseconds in stages.items():
+            _history[name].append(milliseconds)
+    log_event({"event": "rerun", "stages": stages})
+    return stages
+
+
+def rolling_percentiles():
+    """
+    Returns the median and 95th percentile of each stage over the last ROLLING_WINDOW reruns of
+    the process, as a dict of (count, p50 ms, p95 ms) tuples keyed by stage.
+    """
+    with _history_lock:
+        history = {name: np.array(values) for name, values in _history.items()}
+    return {
+        name: (len(values), *np.percentile(values, [50, 95]))
+        for name, values in history.items()
+    }
+
+
+if TIMING_ENABLED:
+    configure_timing_log()
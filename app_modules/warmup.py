@@ -0,0 +1,127 @@
+"""
+This module precomputes views in the background before users ask for them.
+
+A `WarmupPool` runs queued tasks, such as building the figures of an energy type that nobody has
+selected yet, in background threads, so that the first visitor to select it reads them from the
+caches. Tasks run by priority and only while no rerun is running: a rerun marks itself with
+`interactive()`, and the workers wait for it to end before starting their next task. Scheduling
+the tasks of a new dataset version cancels the tasks still queued for the previous one.
+"""
+
+import contextlib
+import itertools
+import logging
+import queue
+import threading
+
+from app_modules.timing import span
+
+WORKERS = 1
+
+logger = logging.getLogger(__name__)
+
+# Priority of the requests to stop a worker, queued after every task.
+STOP_PRIORITY = float("inf")
+
+
+class WarmupPool:
+    """Runs warm-up tasks in background threads, giving way to interactive reruns."""
+
+    def __init__(self, workers=WORKERS):
+        self.version = None
+        self.completed = 0
+        self.cancelled = 0
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._generation = 0
+        self._reruns = 0
+        self._idle = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"warmup-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def schedule(self, version, tasks):
+        """
+        Replaces the queued tasks with the tasks of a dataset version, unless they were already
+        scheduled for that version.
+
+        Args:
+            version (str): The dataset version the tasks precompute views of.
+            tasks (list): (priority, name, function) tuples, the priority being an int; tasks
+                          with the lowest priority run first, in the order they are listed
+                          among equal priorities.
+
+        Returns:
+            bool: Whether the tasks were queued.
+        """
+        with self._idle:
+            if version == self.version:
+                return False
+            self.version = version
+        generation = self.cancel()
+        for priority, name, function in tasks:
+            self._queue.put((priority, next(self._order), generation, name, function))
+        return True
+
+    def cancel(self):
+        """
+        Drops the queued tasks. A task already running finishes.
+
+        Returns:
+            int: The generation of the tasks queued from now on.
+        """
+        with self._idle:
+            self._generation += 1
+            generation = self._generation
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return generation
+            if item[4] is None:
+                # Stop requests are not cancelled.
+                self._queue.put(item)
+                return generation
+            self.cancelled += 1
+
+    @contextlib.contextmanager
+    def interactive(self):
+        """Marks a rerun; no warm-up task starts until every marked rerun has ended."""
+        with self._idle:
+            self._reruns += 1
+        try:
+            yield
+        finally:
+            with self._idle:
+                self._reruns -= 1
+                self._idle.notify_all()
+
+    def stop(self):
+        """Cancels the queued tasks and stops the workers."""
+        self.cancel()
+        for _ in self._workers:
+            self._queue.put((STOP_PRIORITY, next(self._order), None, None, None))
+        for worker in self._workers:
+            worker.join()
+
+    def _work(self):
+        while True:
+            _, _, generation, name, function = self._queue.get()
+            if function is None:
+                return
+            with self._idle:
+                while self._reruns:
+                    self._idle.wait()
+                if generation != self._generation:
+                    self.cancelled += 1
+                    continue
+            try:
+                with span(f"warmup {name}"):
+                    function()
+                self.completed += 1
+            except Exception:
+                # A failed warm-up only means the view is computed when it is first displayed.
+                logger.exception("Warm-up task %s failed", name)
@@ -0,0 +1,90 @@
+"""
+Compares memory and latency of 'region' and 'energy_type' stored as object strings with the same
+columns coded into their fixed dictionaries:
+
+    python -m benchmarks.bench_category_codes --scales 1 10 100
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from app_modules.dataset import compact_dataset
+from benchmarks.synthetic import make_scaled_dataset
+
+
+def previous_build_cube_indices(dataset):
+    """The cube axes as computed before, by factorizing the columns converted to strings."""
+    region_idx, _ = pd.factorize(dataset["region"].astype(str), sort=True)
+    energy_idx, _ = pd.factorize(dataset["energy_type"].astype(str))
+    return region_idx, energy_idx
+
+
+def time_call(call, repeat):
+    """Returns the fastest time, in milliseconds, of one call."""
+    return min(timeit.repeat(call, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Object strings versus dictionary codes.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        coded = compact_dataset(make_scaled_dataset(scale))
+        strings = coded.astype({"region": object, "energy_type": object})
+        region, energy_type = "Bretagne", "Solar"
+
+        memory = {
+            name: frame[["region", "energy_type"]].memory_usage(deep=True, index=False).sum()
+            for name, frame in (("strings", strings), ("codes", coded))
+        }
+        print(
+            f"{scale:>4}x ({len(coded):>8} rows)  region + energy_type memory: "
+            f"strings {memory['strings'] / 2**20:7.2f} MB  codes {memory['codes'] / 2**20:7.2f} MB"
+        )
+
+        cases = [
+            (
+                "filter by region",
+                lambda: strings[strings["region"] == region],
+                lambda: coded[coded["region"] == region],
+            ),
+            (
+                "filter by energy type",
+                lambda: strings[strings["energy_type"] == energy_type],
+                lambda: coded[coded["energy_type"] == energy_type],
+            ),
+            (
+                "groupby region, energy type",
+                lambda: strings.groupby(["region", "energy_type"])["total_volume_sold"].sum(),
+                lambda: coded.groupby(["region", "energy_type"], observed=True)[
+                    "total_volume_sold"
+                ].sum(),
+            ),
+            (
+                "cube axes (factorize vs codes)",
+                lambda: previous_build_cube_indices(coded),
+                lambda: (
+                    coded["region"].cat.codes.to_numpy(),
+                    coded["energy_type"].cat.codes.to_numpy(),
+                ),
+            ),
+        ]
+
+        for name, previous, current in cases:
+            if name.startswith("filter"):
+                assert np.array_equal(previous().index, current().index), name
+            previous_ms = time_call(previous, args.repeat)
+            current_ms = time_call(current, args.repeat)
+            print(
+                f"      {name:<32} strings {previous_ms:8.2f} ms  codes {current_ms:8.2f} ms  "
+                f"speed-up {previous_ms / current_ms:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
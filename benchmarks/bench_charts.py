@@ -0,0 +1,259 @@
+"""
+Times the combined chart builders against the previous Plotly Express based assembly, which built
+full `px` figures only to copy their traces into the subplots and grouped the monthly rows of the
+selection on every build, where the builders now read the series from the rollups:
+
+    python -m benchmarks.bench_charts --scales 1 10
+"""
+
+import argparse
+import datetime
+import timeit
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from app_modules.charts import (
+    SEASON_COLORS,
+    SUPTITLE_FONT_SIZE,
+    create_combined_chart,
+    create_combined_energy_chart,
+)
+from app_modules.colors import ENERGY_TYPE_COLORS
+from app_modules.cube import build_aggregate_cube, cube_to_dataframe
+from app_modules.dataset import SEASONS, SEASONS_MAPPING, compact_dataset
+from app_modules.query import Selection
+from app_modules.rollups import build_rollups
+from benchmarks.synthetic import make_scaled_dataset
+
+# ---------------------------------------------------------------------------
+# -- Plotly Express based assembly, regrouping the filtered rows per chart --
+# ---------------------------------------------------------------------------
+
+
+def previous_create_combined_chart(df, region, width, height, time_interval):
+    tech_volume = (
+        df.groupby("energy_type", observed=True)["total_volume_sold"].sum().reset_index()
+    )
+    pie_fig = px.pie(
+        tech_volume,
+        values="total_volume_sold",
+        names="energy_type",
+        color="energy_type",
+        color_discrete_map=ENERGY_TYPE_COLORS,
+    )
+    pie_fig.update_traces(textinfo="percent+label")
+
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    grouped_df = (
+        df.groupby(["date", "energy_type"], observed=True)["total_volume_sold"]
+        .sum()
+        .reset_index()
+    )
+    if time_interval == "Yearly":
+        grouped_df["year"] = grouped_df["date"].dt.year
+        grouped_df = grouped_df.groupby(
+            ["year", "energy_type"], as_index=False, observed=True
+        )["total_volume_sold"].sum()
+        x_col = "year"
+    else:
+        x_col = "date"
+    bar_fig = px.bar(
+        grouped_df,
+        x=x_col,
+        y="total_volume_sold",
+        color="energy_type",
+        color_discrete_map=ENERGY_TYPE_COLORS,
+    )
+
+    fig = make_subplots(
+        rows=1,
+        cols=2,
+        column_widths=[0.5, 0.5],
+        subplot_titles=(
+            "Proportion of Volume by Energy Type",
+            "Total Volume per Energy Type over Time",
+        ),
+        specs=[[{"type": "domain"}, {"type": "xy"}]],
+    )
+    for annotation in fig["layout"]["annotations"]:
+        annotation["font"] = dict(size=20)
+    fig.add_trace(
+        go.Pie(
+            labels=pie_fig["data"][0]["labels"],
+            values=pie_fig["data"][0]["values"],
+            textinfo="percent+label",
+            name="",
+            domain={"column": 0},
+            showlegend=False,
+            marker_colors=[
+                ENERGY_TYPE_COLORS[label] for label in pie_fig["data"][0]["labels"]
+            ],
+        ),
+        row=1,
+        col=1,
+    )
+    for trace in bar_fig["data"]:
+        fig.add_trace(trace.update(showlegend=True), row=1, col=2)
+    fig.update_layout(
+        legend_traceorder="reversed",
+        height=height,
+        width=width,
+        barmode="stack",
+        title_text=f"{region}",
+        title_x=0.3,
+        title_font=dict(size=SUPTITLE_FONT_SIZE),
+        legend_title_text="Energy Types :",
+        legend_font_size=22,
+        legend_title_font_size=18,
+    )
+    return fig
+
+
+def previous_create_combined_energy_chart(df, region, energy_type, time_interval):
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    grouped_df = df.groupby(["date", "energy_type"], as_index=False, observed=True)[
+        "total_volume_sold"
+    ].sum()
+    if time_interval == "Yearly":
+        grouped_df["year"] = grouped_df["date"].dt.year
+        grouped_df = grouped_df.groupby("year", as_index=False)["total_volume_sold"].sum()
+        x_col = "year"
+    else:
+        x_col = "date"
+    energy_bar_fig = px.bar(
+        grouped_df,
+        x=x_col,
+        y="total_volume_sold",
+        labels={"total_volume_sold": "Total Volume Sold"},
+        title=f"Total Volume Sold Over Time for {energy_type} Energy",
+    )
+    energy_bar_fig.update_traces(marker_color=ENERGY_TYPE_COLORS.get(energy_type, "grey"))
+
+    df["season"] = df["date"].dt.month.map(SEASONS_MAPPING)
+    season_df = df.groupby("season")["total_volume_sold"].sum().reset_index()
+    season_df["percentage_of_total"] = (
+        season_df["total_volume_sold"] / df["total_volume_sold"].sum()
+    ) * 100
+    season_df["season"] = season_df["season"].astype(
+        pd.CategoricalDtype(categories=SEASONS, ordered=True)
+    )
+    season_df = season_df.sort_values(by="season")
+    energy_season_fig = px.bar(
+        season_df,
+        x="season",
+        y="percentage_of_total",
+        color="season",
+        color_discrete_map=SEASON_COLORS,
+        labels={"percentage_of_total": "Percentage of Sold Energy", "season": "Season"},
+        title=f"Percentage of {energy_type} Sold per Season",
+    )
+
+    fig = make_subplots(
+        rows=1,
+        cols=2,
+        column_widths=[0.5, 0.5],
+        subplot_titles=(
+            f"Total Volume Sold Over Time for {energy_type} Energy",
+            f"Percentage of {energy_type} Sold per Season",
+        ),
+    )
+    for trace in energy_season_fig["data"]:
+        fig.add_trace(trace.update(width=0.4, showlegend=False), row=1, col=2)
+    for trace in energy_bar_fig["data"]:
+        fig.add_trace(trace.update(showlegend=False), row=1, col=1)
+    fig.update_layout(
+        title_text=region, title_x=0.4, title_font=dict(size=SUPTITLE_FONT_SIZE)
+    )
+    return fig
+
+
+# ----------------
+# -- Benchmark  --
+# ----------------
+
+
+def trace_values(fig):
+    """Returns the plotted names, labels and values of a figure, trace by trace."""
+    values = []
+    for trace in fig.data:
+        keys = ["labels", "values"] if trace.type == "pie" else ["x", "y"]
+        values.append(
+            (trace.type, trace.name, trace.xaxis if trace.type == "bar" else None)
+            + tuple(tuple(np.asarray(trace[key]).tolist()) for key in keys)
+        )
+    return sorted(values, key=lambda value: str(value[:4]))
+
+
+def same_traces(previous, current):
+    """
+    Whether two figures plot the same traces. Values are compared with a relative tolerance: the
+    rollups sum the months of a period in a different order than a groupby does.
+    """
+    previous_values, current_values = trace_values(previous), trace_values(current)
+    return len(previous_values) == len(current_values) and all(
+        a[:4] == b[:4] and np.allclose(a[4], b[4])
+        for a, b in zip(previous_values, current_values)
+    )
+
+
+def time_builder(build, repeat):
+    """Returns the fastest time, in milliseconds, of one call to `build`."""
+    return min(timeit.repeat(build, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Combined chart assembly timing.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        cube = build_aggregate_cube(compact_dataset(make_scaled_dataset(scale)))
+        rollups = build_rollups(cube)
+        start_date = pd.Timestamp(cube.months[0]).to_pydatetime()
+        end_date = datetime.datetime(2100, 1, 1)
+        all_types = cube_to_dataframe(cube, start_date, end_date)
+        solar = cube_to_dataframe(cube, start_date, end_date, energy_type="Solar")
+        selection = Selection(start_date, end_date)
+
+        cases = [
+            (
+                f"combined chart ({interval})",
+                lambda i=interval: previous_create_combined_chart(
+                    all_types, "All Regions", 1000, 500, i
+                ),
+                lambda i=interval: create_combined_chart(
+                    rollups, selection._replace(time_interval=i), 1000, 500
+                ),
+            )
+            for interval in ("Yearly", "Monthly")
+        ] + [
+            (
+                f"combined energy chart ({interval})",
+                lambda i=interval: previous_create_combined_energy_chart(
+                    solar, "All Regions", "Solar", i
+                ),
+                lambda i=interval: create_combined_energy_chart(
+                    rollups, selection._replace(energy_type="Solar", time_interval=i)
+                ),
+            )
+            for interval in ("Yearly", "Monthly")
+        ]
+        for name, previous, current in cases:
+            assert same_traces(previous(), current()), name
+            previous_ms = time_builder(previous, args.repeat)
+            current_ms = time_builder(current, args.repeat)
+            print(
+                f"{scale:>4}x  {name:<35} previous {previous_ms:7.1f} ms  "
+                f"rollups {current_ms:7.1f} ms  speed-up {previous_ms / current_ms:4.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
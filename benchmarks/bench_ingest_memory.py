@@ -0,0 +1,102 @@
+"""
+Measures the peak memory of ingesting installation-level extracts of growing size.
+
+The chunked aggregation should keep peak RSS flat as the extract grows, while reading the whole
+extract at once, as the preprocessing notebook did, grows with it. Each ingestion runs in a fresh
+interpreter so that peak RSS is measured from a cold process:
+
+    python -m benchmarks.bench_ingest_memory --scales 1 10 100 --chunk-size 20000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import REAL_MONTHS, make_raw_dataset, to_raw_extract
+
+# Runs in the child interpreter; prints ingestion seconds, peak RSS and output rows. The
+# high-water mark is read from /proc because ru_maxrss survives exec and would report the
+# parent's peak.
+INGEST_SCRIPT = """
+import json, os, sys, time
+import pandas as pd
+from preprocess_data.ingest import RAW_SEPARATOR, ingest
+
+def peak_rss_kb():
+    with open("/proc/self/status") as status:
+        line = next(line for line in status if line.startswith("VmHWM:"))
+    return int(line.split()[1])
+
+raw_path, output_dir, mode, chunk_size = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+baseline_kb = peak_rss_kb()
+start = time.perf_counter()
+if mode == "whole":
+    rows = len(pd.read_csv(raw_path, sep=RAW_SEPARATOR))
+else:
+    csv_path = os.path.join(output_dir, "dataset.csv")
+    columnar_path = os.path.join(output_dir, "dataset.parquet")
+    rows = ingest(raw_path, csv_path, columnar_path, chunk_size, full=True, aggregate=True)["rows"]
+seconds = time.perf_counter() - start
+peak_kb = peak_rss_kb()
+print(json.dumps({
+    "seconds": seconds,
+    "peak_rss_mb": peak_kb / 1024,
+    "ingest_rss_mb": (peak_kb - baseline_kb) / 1024,
+    "rows": rows,
+}))
+"""
+
+MODES = {
+    "whole": "whole extract in memory (notebook)",
+    "chunked": "chunked aggregation",
+}
+
+
+def write_extract(path, rows_per_key):
+    """Writes a raw extract with `rows_per_key` installations per (month, region, energy type)."""
+    extract = to_raw_extract(make_raw_dataset(REAL_MONTHS, rows_per_key))
+    extract.to_csv(path, sep=";", index=False)
+
+
+def run_ingestion(raw_path, output_dir, mode, chunk_size):
+    """Ingests `raw_path` in a fresh interpreter. Returns its measurements."""
+    output = subprocess.run(
+        [sys.executable, "-c", INGEST_SCRIPT, raw_path, output_dir, mode, str(chunk_size)],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of the extract ingestion.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--chunk-size", type=int, default=20_000)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            raw_path = os.path.join(tmp_dir, f"extract_{scale}.csv")
+            write_extract(raw_path, scale)
+            file_mb = os.path.getsize(raw_path) / 2**20
+            for mode, label in MODES.items():
+                run = run_ingestion(raw_path, tmp_dir, mode, args.chunk_size)
+                run.update(scale=scale, mode=mode, file_mb=file_mb)
+                results.append(run)
+                print(
+                    f"{scale:>5}x  {label:<36} {run['seconds']:7.2f} s  "
+                    f"ingest RSS {run['ingest_rss_mb']:8.1f} MB  rows {run['rows']:>8}  "
+                    f"file {file_mb:8.1f} MB"
+                )
+            os.remove(raw_path)
+    return results
+
+
+if __name__ == "__main__":
+    main()
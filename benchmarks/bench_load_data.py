@@ -0,0 +1,105 @@
+"""
+Compares load time and memory of the CSV and columnar dataset paths.
+
+Each load runs in a fresh interpreter so that peak RSS is measured from a cold process:
+
+    python -m benchmarks.bench_load_data --scales 1 10 100
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from app_modules.dataset import build_columnar_dataset
+from benchmarks.synthetic import make_scaled_dataset
+
+# Runs in the child interpreter; prints load seconds, peak RSS and RSS growth caused by the load.
+# The high-water mark is read from /proc because ru_maxrss survives exec and would report the
+# parent's peak.
+LOADER_SCRIPT = """
+import json, sys, time
+import pandas as pd
+from app_modules.dataset import read_columnar_dataset, read_csv_dataset
+
+def peak_rss_kb():
+    with open("/proc/self/status") as status:
+        line = next(line for line in status if line.startswith("VmHWM:"))
+    return int(line.split()[1])
+
+path, mode = sys.argv[1], sys.argv[2]
+baseline_kb = peak_rss_kb()
+start = time.perf_counter()
+if mode == "csv_full":
+    dataset = pd.read_csv(path)
+    dataset["date"] = pd.to_datetime(dataset["date"], format="%Y-%m")
+elif mode == "csv":
+    dataset = read_csv_dataset(path)
+else:
+    dataset = read_columnar_dataset(path)
+seconds = time.perf_counter() - start
+peak_kb = peak_rss_kb()
+print(json.dumps({
+    "seconds": seconds,
+    "peak_rss_mb": peak_kb / 1024,
+    "load_rss_mb": (peak_kb - baseline_kb) / 1024,
+    "frame_mb": dataset.memory_usage(deep=True).sum() / 2**20,
+}))
+"""
+
+MODES = {
+    "csv_full": "CSV, all columns (previous load_data)",
+    "csv": "CSV, dashboard columns",
+    "columnar": "Parquet, dashboard columns",
+}
+
+
+def run_loader(path, mode, repeat):
+    """Loads `path` in `repeat` fresh interpreters. Returns the fastest run."""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", LOADER_SCRIPT, path, mode],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=os.getcwd(),
+        ).stdout
+        runs.append(json.loads(output))
+    return min(runs, key=lambda run: run["seconds"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            csv_path = os.path.join(tmp_dir, f"data_{scale}.csv")
+            columnar_path = os.path.join(tmp_dir, f"data_{scale}.parquet")
+            make_scaled_dataset(scale).to_csv(csv_path, index=False)
+            build_columnar_dataset(csv_path, columnar_path)
+            sizes = {
+                "csv": os.path.getsize(csv_path),
+                "columnar": os.path.getsize(columnar_path),
+            }
+            for mode, label in MODES.items():
+                path = columnar_path if mode == "columnar" else csv_path
+                run = run_loader(path, mode, args.repeat)
+                run.update(scale=scale, mode=mode, file_mb=sizes.get(mode, sizes["csv"]) / 2**20)
+                results.append(run)
+                print(
+                    f"{scale:>5}x  {label:<40} {run['seconds'] * 1000:9.1f} ms  "
+                    f"load RSS {run['load_rss_mb']:8.1f} MB  frame {run['frame_mb']:8.2f} MB  "
+                    f"file {run['file_mb']:8.2f} MB"
+                )
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Times the partitioned aggregation of an installation-level extract with 1, 2, 4 and 8 worker
+processes, and checks that every worker count produces bit-identical aggregates:
+
+    python -m benchmarks.bench_parallel_ingest --scale 100
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import REAL_MONTHS, make_raw_dataset, to_raw_extract
+from preprocess_data.ingest import CHUNK_SIZE, aggregate_extract, partition_extract
+
+
+def write_extract(path, rows_per_key):
+    """
+    Writes a raw extract with `rows_per_key` installations per (month, region, energy type).
+    Volumes are made fractional so that the order of the float additions shows in the sums.
+    """
+    dataset = make_raw_dataset(REAL_MONTHS, rows_per_key)
+    dataset["total_volume_sold"] = dataset["total_volume_sold"] / 7
+    to_raw_extract(dataset).to_csv(path, sep=";", index=False)
+
+
+def aggregate_bytes(rows):
+    """Returns the exact bytes of the aggregated volumes, to compare runs bit for bit."""
+    volumes = rows[["total_volume_auctionned", "total_volume_sold"]].to_numpy(dtype="float64")
+    return np.ascontiguousarray(volumes).tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel aggregation scaling.")
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--partition-mb", type=int, default=16)
+    args = parser.parse_args()
+
+    partition_bytes = args.partition_mb * 2**20
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        raw_path = os.path.join(tmp_dir, "extract.csv")
+        write_extract(raw_path, args.scale)
+        _, ranges = partition_extract(raw_path, partition_bytes)
+        print(
+            f"extract {os.path.getsize(raw_path) / 2**20:.1f} MB in {len(ranges)} partitions, "
+            f"{os.cpu_count()} CPUs"
+        )
+
+        reference = None
+        serial_seconds = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            rows = aggregate_extract(
+                raw_path,
+                chunk_size=args.chunk_size,
+                workers=workers,
+                partition_bytes=partition_bytes,
+            )
+            seconds = time.perf_counter() - start
+            if reference is None:
+                reference, serial_seconds = aggregate_bytes(rows), seconds
+            identical = aggregate_bytes(rows) == reference
+            print(
+                f"{workers:>3} workers  {seconds:7.2f} s  speed-up {serial_seconds / seconds:4.2f}x  "
+                f"bit-identical {identical}"
+            )
+            assert identical, f"{workers} workers changed the aggregates"
+
+
+if __name__ == "__main__":
+    main()
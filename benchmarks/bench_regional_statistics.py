@@ -0,0 +1,70 @@
+"""
+Times `compute_regional_energy_statistics` against the per-energy-type implementation on
+synthetic datasets; tests/test_regional_statistics.py checks that both give the same table:
+
+    python -m benchmarks.bench_regional_statistics --scales 1 10 100
+"""
+
+import argparse
+import timeit
+
+import pandas as pd
+
+from app_modules.dataset import compact_dataset
+from app_modules.filter import compute_regional_energy_statistics
+from benchmarks.synthetic import make_scaled_dataset
+
+
+def previous_compute_regional_energy_statistics(filtered_df):
+    """Runs one mask, groupby and merge per energy type over the filtered frame it is given."""
+    energy_types = filtered_df["energy_type"].unique()
+    total_volume_df = (
+        filtered_df.groupby("region", observed=True)
+        .agg(total_volume=("total_volume_sold", "sum"))
+        .reset_index()
+    )
+    total_volume_df["total_volume_millions"] = total_volume_df["total_volume"] / 1_000_000
+
+    regions_df = total_volume_df
+    for energy_type in energy_types:
+        energy_df = filtered_df[filtered_df["energy_type"] == energy_type]
+        grouped_df = (
+            energy_df.groupby("region", observed=True)
+            .agg(**{f"{energy_type}_total_volume": ("total_volume_sold", "sum")})
+            .reset_index()
+        )
+        grouped_df[f"{energy_type}_total_volume_millions"] = (
+            grouped_df[f"{energy_type}_total_volume"] / 1_000_000
+        )
+        grouped_df[f"{energy_type}_percentage"] = (
+            grouped_df[f"{energy_type}_total_volume"] / regions_df["total_volume"]
+        ) * 100
+        regions_df = pd.merge(regions_df, grouped_df, on="region", how="left")
+
+    return regions_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regional statistics parity and timing.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        dataset = compact_dataset(make_scaled_dataset(scale))
+        timings = {}
+        for name, function in [
+            ("previous", previous_compute_regional_energy_statistics),
+            ("vectorized", compute_regional_energy_statistics),
+        ]:
+            runs = timeit.repeat(lambda: function(dataset), number=1, repeat=args.repeat)
+            timings[name] = min(runs)
+        print(
+            f"{scale:>5}x ({len(dataset):>9} rows)  previous {timings['previous'] * 1000:8.2f} ms  "
+            f"vectorized {timings['vectorized'] * 1000:8.2f} ms  "
+            f"speed-up {timings['previous'] / timings['vectorized']:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compares the numeric regional tables with the previous string-formatted ones: build time and the
+size of the Arrow payload Streamlit sends to the browser:
+
+    python -m benchmarks.bench_regional_table
+"""
+
+import argparse
+import datetime
+import timeit
+
+import pandas as pd
+from streamlit.dataframe_util import convert_pandas_df_to_arrow_bytes
+
+from app_modules.cube import build_aggregate_cube
+from app_modules.dataset import compact_dataset
+from app_modules.query import Selection, regional_statistics
+from app_modules.tables import regional_table
+from benchmarks.synthetic import make_scaled_dataset
+
+
+def previous_format_volume(number):
+    """Formats one volume cell as a string with its M€/k€ unit."""
+    if abs(number) >= 1_000_000:
+        return f"{number/1_000_000:.2f} M€"
+    elif abs(number) >= 1_000:
+        return f"{number/1_000:.2f} k€"
+    else:
+        return f"{number:.2f}€"
+
+
+def previous_format_dataframe(df):
+    """Builds the overview table with every volume and percentage pre-formatted as strings."""
+    formatted_df = df.copy()
+    cols_to_drop = [col for col in df.columns if col.endswith("_millions")]
+    formatted_df = formatted_df.drop(cols_to_drop, axis=1)
+    formatted_df = formatted_df.sort_values(by="total_volume", ascending=False).reset_index(
+        drop=True
+    )
+    for col in formatted_df.columns:
+        if col.endswith("_total_volume") or col == "total_volume":
+            formatted_df[col] = formatted_df[col].apply(previous_format_volume)
+            formatted_df.rename(columns={col: col.replace("_total_volume", "")}, inplace=True)
+        elif col.endswith("_percentage"):
+            formatted_df[col] = formatted_df[col].apply(lambda x: f"{x:.2f}%")
+            formatted_df.rename(columns={col: col.replace("_percentage", " %")}, inplace=True)
+    return formatted_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regional table build time and payload size.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cube = build_aggregate_cube(compact_dataset(make_scaled_dataset(1)))
+    selection = Selection(pd.Timestamp(cube.months[0]).to_pydatetime(), datetime.datetime(2100, 1, 1))
+    regions_df = regional_statistics(cube, selection)
+
+    previous = previous_format_dataframe(regions_df)
+    current, _ = regional_table(regions_df)
+    # Same regions in the same order, and the numbers behind the strings are the same.
+    assert list(previous["region"].astype(str)) == list(current["region"].astype(str))
+    assert previous["Solar %"].tolist() == [f"{x:.2f}%" for x in current["Solar_percentage"]]
+
+    for name, build in [
+        ("previous (strings)", lambda: previous_format_dataframe(regions_df)),
+        ("numeric", lambda: regional_table(regions_df)[0]),
+    ]:
+        seconds = min(timeit.repeat(build, number=1, repeat=args.repeat))
+        payload = convert_pandas_df_to_arrow_bytes(build())
+        print(f"{name:<20} build {seconds * 1000:7.2f} ms  Arrow payload {len(payload):7d} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares the memory of app processes holding their own pandas copy of the dataset with processes
+mapping it from the shared store.
+
+Each worker runs in a fresh interpreter, opens the dataset, touches every column as the app
+would over its lifetime, and reports its private (anonymous) RSS, which is what each extra
+process costs, next to the file-backed RSS, which all processes share in the page cache:
+
+    python -m benchmarks.bench_shared_store --scales 1 10 100
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from app_modules.cube import build_aggregate_cube
+from app_modules.dataset import add_derived_columns, build_columnar_dataset, read_columnar_dataset
+from app_modules.shared_store import write_shared_store
+from benchmarks.synthetic import make_scaled_dataset
+
+# Runs in the child interpreter; prints private and file-backed RSS once the data is touched.
+WORKER_SCRIPT = """
+import json, sys
+from app_modules.cube import build_aggregate_cube
+from app_modules.dataset import add_derived_columns, read_columnar_dataset
+from app_modules.shared_store import open_shared_store
+
+def rss_kb():
+    with open("/proc/self/status") as status:
+        fields = dict(line.split(":", 1) for line in status)
+    return {key: int(fields[key].split()[0]) for key in ("RssAnon", "RssFile")}
+
+mode, path = sys.argv[1], sys.argv[2]
+baseline = rss_kb()
+if mode == "pandas":
+    dataset = add_derived_columns(read_columnar_dataset(path))
+    cube = build_aggregate_cube(dataset)
+else:
+    dataset, cube = open_shared_store("bench", path)
+for column in dataset.columns:
+    values = dataset[column].array
+    backing = getattr(values, "codes", None)
+    if backing is None:
+        backing = values.asi8 if hasattr(values, "asi8") else values.to_numpy()
+    backing.view("uint8").sum()
+for array in cube:
+    array.sum() if array.dtype.kind in "iuf" else None
+after = rss_kb()
+print(json.dumps({
+    "private_mb": (after["RssAnon"] - baseline["RssAnon"]) / 1024,
+    "shared_mb": (after["RssFile"] - baseline["RssFile"]) / 1024,
+    "rows": len(dataset),
+}))
+"""
+
+MODES = {
+    "pandas": "own pandas copy (previous)",
+    "shared": "memory-mapped shared store",
+}
+
+
+def run_worker(mode, path):
+    """Opens the dataset in a fresh interpreter. Returns its memory measurements."""
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER_SCRIPT, mode, path],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-process memory of the shared store.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            csv_path = os.path.join(tmp_dir, f"data_{scale}.csv")
+            columnar_path = os.path.join(tmp_dir, f"data_{scale}.parquet")
+            store_dir = os.path.join(tmp_dir, f"store_{scale}")
+            make_scaled_dataset(scale).to_csv(csv_path, index=False)
+            build_columnar_dataset(csv_path, columnar_path)
+            dataset = add_derived_columns(read_columnar_dataset(columnar_path))
+            write_shared_store(dataset, build_aggregate_cube(dataset), "bench", store_dir)
+
+            for mode, label in MODES.items():
+                run = run_worker(mode, columnar_path if mode == "pandas" else store_dir)
+                run.update(scale=scale, mode=mode)
+                results.append(run)
+                print(
+                    f"{scale:>5}x  {label:<30} rows {run['rows']:>8}  "
+                    f"private RSS {run['private_mb']:7.1f} MB  shared RSS {run['shared_mb']:7.1f} MB"
+                )
+    return results
+
+
+if __name__ == "__main__":
+    main()
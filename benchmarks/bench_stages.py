@@ -0,0 +1,238 @@
+"""
+Times each stage of a dashboard rerun on synthetic datasets 1x, 10x, 100x and 1000x the size of
+the real extract, and writes the results as JSON so that runs on two commits can be compared:
+
+    python -m benchmarks.bench_stages --output stages.json
+    python -m benchmarks.bench_stages --output stages.json --compare previous_stages.json
+
+Run it from the repository root, where the map stages find `data/france_regions*.geojson`.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app_modules.charts import (
+    build_energy_region_pie_chart,
+    create_combined_chart,
+    create_combined_energy_chart,
+)
+from app_modules.cube import build_aggregate_cube
+from app_modules.dataset import DATASET_COLUMNS, build_columnar_dataset, load_dataset
+from app_modules.filter import compute_regional_energy_statistics, filter_dataframe_by_date
+from app_modules.map import (
+    MAP_ZOOM,
+    attach_tooltip,
+    build_tooltip_properties,
+    configure_map_settings,
+    create_choropleth,
+    initialize_map,
+    select_geometry_path,
+    update_tooltip,
+)
+from app_modules.query import Selection, regional_statistics, selection_frame, volume_over_time
+from app_modules.rollups import build_rollups
+from app_modules.tables import regional_table
+from benchmarks.synthetic import make_scaled_dataset
+
+MAP_ENERGY_TYPES = ["All Renewables", "Solar"]
+
+# Outside `streamlit run`, every cached call and session state access warns about the missing
+# script context.
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+
+def build_map(regions_df, energy_type, selection):
+    """Builds the folium map of `display_map`, without rendering it in Streamlit."""
+    # The tooltips are memoized per selection; clearing them times the build of a new selection.
+    build_tooltip_properties.clear()
+    map = initialize_map()
+    color_column, total_column, percentage_column = configure_map_settings(energy_type)
+    choropleth = create_choropleth(
+        regions_df, color_column, energy_type, select_geometry_path(MAP_ZOOM)
+    )
+    choropleth.geojson.add_to(map)
+    update_tooltip(
+        choropleth,
+        regions_df,
+        energy_type,
+        selection.start_date,
+        selection.end_date,
+        total_column,
+        percentage_column,
+        ("bench", selection.start_date, selection.end_date),
+    )
+    attach_tooltip(choropleth, energy_type)
+    return map
+
+
+def time_stage(function, repeat):
+    """
+    Calls `function` `repeat` times after one warm-up call.
+
+    Returns:
+        dict: The minimum, median and maximum time of a call, in milliseconds.
+    """
+    function()
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": min(runs),
+        "median_ms": float(np.median(runs)),
+        "max_ms": max(runs),
+    }
+
+
+def stages(tmp_dir, scale):
+    """
+    Prepares the inputs of every stage for a dataset `scale` times the real size.
+
+    Returns:
+        tuple: The number of rows of the dataset and the (stage name, function) pairs to time,
+               in the order a rerun goes through them.
+    """
+    csv_path = os.path.join(tmp_dir, f"data_{scale}.csv")
+    columnar_path = os.path.join(tmp_dir, f"data_{scale}.parquet")
+    missing_path = os.path.join(tmp_dir, "missing.parquet")
+    make_scaled_dataset(scale, geometry=False)[DATASET_COLUMNS].to_csv(csv_path, index=False)
+    build_columnar_dataset(csv_path, columnar_path)
+
+    dataset = load_dataset(csv_path, columnar_path)
+    cube = build_aggregate_cube(dataset)
+    months = pd.DatetimeIndex(cube.months)
+    # The last twelve months, as selected with the sidebar slider.
+    selection = Selection(months[-12].to_pydatetime(), months[-1].to_pydatetime())
+    filtered = filter_dataframe_by_date(dataset, selection.start_date, selection.end_date)
+    regions_df = compute_regional_energy_statistics(filtered)
+    rollups = build_rollups(cube)
+
+    pairs = [
+        ("load_dataset (csv)", lambda: load_dataset(csv_path, missing_path)),
+        ("load_dataset (columnar)", lambda: load_dataset(csv_path, columnar_path)),
+        ("build_aggregate_cube", lambda: build_aggregate_cube(dataset)),
+        (
+            "filter_dataframe_by_date",
+            lambda: filter_dataframe_by_date(dataset, selection.start_date, selection.end_date),
+        ),
+        ("compute_regional_energy_statistics", lambda: compute_regional_energy_statistics(filtered)),
+        ("regional_statistics (cube)", lambda: regional_statistics(cube, selection)),
+        ("selection_frame (cube)", lambda: selection_frame(cube, selection)),
+        ("build_rollups", lambda: build_rollups(cube)),
+        ("regional_table", lambda: regional_table(regions_df)),
+        ("regional_table (Solar)", lambda: regional_table(regions_df, "Solar")),
+    ]
+    for energy_type in MAP_ENERGY_TYPES:
+        pairs += [
+            (
+                f"map build ({energy_type})",
+                lambda e=energy_type: build_map(regions_df, e, selection),
+            ),
+            (
+                f"map html ({energy_type})",
+                lambda e=energy_type: build_map(regions_df, e, selection).get_root().render(),
+            ),
+        ]
+    for interval in ("Yearly", "Monthly"):
+        interval_selection = selection._replace(time_interval=interval)
+        solar_selection = interval_selection._replace(energy_type="Solar")
+        pairs += [
+            (
+                f"volume_over_time ({interval})",
+                lambda s=interval_selection: volume_over_time(rollups, s),
+            ),
+            (
+                f"create_combined_chart ({interval})",
+                lambda s=interval_selection: create_combined_chart(rollups, s, 1000, 500),
+            ),
+            (
+                f"create_combined_energy_chart ({interval})",
+                lambda s=solar_selection: create_combined_energy_chart(rollups, s),
+            ),
+        ]
+    pairs.append(
+        (
+            "build_energy_region_pie_chart",
+            lambda: build_energy_region_pie_chart(regions_df, "Solar", 5),
+        )
+    )
+    return len(dataset), pairs
+
+
+def git_commit():
+    """Returns the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path):
+    """Prints the ratio of each stage's minimum time to the one recorded in `previous_path`."""
+    with open(previous_path, encoding="utf-8") as previous_file:
+        previous = json.load(previous_file)
+    previous_runs = {(run["scale"], run["stage"]): run for run in previous["results"]}
+    print(f"\ncompared with {previous.get('commit') or previous_path}:")
+    for run in results:
+        before = previous_runs.get((run["scale"], run["stage"]))
+        if before is None:
+            continue
+        ratio = run["min_ms"] / before["min_ms"]
+        print(
+            f"{run['scale']:>5}x  {run['stage']:<45} {before['min_ms']:9.2f} ms -> "
+            f"{run['min_ms']:9.2f} ms  ({ratio:5.2f}x)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage timing of a dashboard rerun.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_stages.json", help="JSON file to write.")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            rows, pairs = stages(tmp_dir, scale)
+            for stage, function in pairs:
+                run = {"scale": scale, "rows": rows, "stage": stage}
+                run.update(time_stage(function, args.repeat))
+                results.append(run)
+                print(
+                    f"{scale:>5}x ({rows:>9} rows)  {stage:<45} min {run['min_ms']:9.2f} ms  "
+                    f"median {run['median_ms']:9.2f} ms"
+                )
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"\nwrote {len(results)} timings to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
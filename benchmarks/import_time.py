@@ -0,0 +1,90 @@
+"""
+Reports the import time of the app module, in the style of `python -X importtime`, and which of
+the heavy plotting and mapping packages it loads up front:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --max-ms 2000   # exits with an error above the budget
+
+The charts and map modules import Plotly, folium and streamlit_folium when they first draw, so
+importing `app` should not load any of HEAVY_MODULES beyond those Streamlit itself imports
+(`st.plotly_chart` loads plotly.graph_objects).
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    "plotly.express",
+    "plotly.graph_objects",
+    "plotly.subplots",
+    "folium",
+    "streamlit_folium",
+    "PIL.Image",
+]
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(module):
+    """
+    Imports `module` in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        tuple: The cumulative import time of `module` in microseconds, its direct imports as
+               (cumulative microseconds, name) pairs, and the HEAVY_MODULES that were loaded.
+    """
+    script = (
+        f"import json, sys; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+    )
+    # A module is reported after its own imports, which are indented by two more spaces.
+    children = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if depth == 3:
+            children.append((cumulative, name))
+        elif depth == 1:
+            if name == module:
+                return cumulative, children, json.loads(result.stdout)
+            children = []
+    raise RuntimeError(f"{module} was already imported at startup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time report.")
+    parser.add_argument("--module", default="app", help="Module to import.")
+    parser.add_argument("--top", type=int, default=10, help="Number of imports listed.")
+    parser.add_argument("--max-ms", type=float, help="Fail when the import takes longer.")
+    args = parser.parse_args()
+
+    total, children, heavy_loaded = import_profile(args.module)
+    total_ms = total / 1000
+    print(f"import {args.module}: {total_ms:.0f} ms")
+    for cumulative, name in sorted(children, reverse=True)[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    _, _, by_streamlit = import_profile("streamlit")
+    heavy_loaded = [
+        f"{name} (by streamlit)" if name in by_streamlit else name for name in heavy_loaded
+    ]
+    print(f"heavy modules loaded at import: {', '.join(heavy_loaded) or 'none'}")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        sys.exit(f"import {args.module} took {total_ms:.0f} ms, over the {args.max_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Drives concurrent dashboard sessions against `app.py` with Streamlit's AppTest and reports, for
+each number of concurrent sessions, the rerun throughput, latency percentiles and memory growth
+per session:
+
+    python -m benchmarks.load_test --concurrency 1 2 4 8 --actions 20
+    python -m benchmarks.load_test --scale 100 --output load_test.json
+
+Each session opens the app and then repeatedly moves the date slider, switches energy types,
+clicks a region and toggles the time aggregation, as a visitor would. All sessions run in this
+process and share its caches, like the sessions of one server process. Without --scale the app
+reads `data/` in the current directory; with it, the app runs in a temporary copy whose dataset
+is synthetic and `scale` times the size of the real one.
+
+Failed reruns are counted apart from the latencies, and the script exits with status 1 when any
+rerun failed.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import unittest.mock
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.util import patch_config_options
+
+from app_modules.colors import ENERGY_TYPES
+from app_modules.dataset import CSV_PATH, DATASET_COLUMNS
+from app_modules.snapshot import wait_for_snapshot
+from benchmarks.synthetic import make_scaled_dataset
+
+ACTIONS = ["date range", "energy type", "region", "time interval"]
+TIMEOUT_SECONDS = 120
+
+
+@contextlib.contextmanager
+def concurrent_app_tests():
+    """
+    Lets several AppTest sessions run at the same time in this process.
+
+    AppTest sets process-wide state around each run: it patches `config.get_option` so that
+    widgets record what the test needs, and sets the Runtime singleton. When a run ends, it
+    restores both, even while the scripts of other sessions are still running. Those scripts
+    would then skip recording their widgets, which breaks their next run, or find no runtime.
+    Within this context, the config stays patched, and the runtime of the last run started
+    stands in for a singleton that a finished run has cleared. Each run also compiles the
+    script in a cache of its own, and concurrent compilations can fail on Python 3.11, so they
+    take turns.
+    """
+    last_runtime = []
+    runtime_instance = Runtime.instance
+    get_bytecode = ScriptCache.get_bytecode
+    compile_lock = threading.Lock()
+
+    def instance():
+        if Runtime._instance is not None:
+            last_runtime[:] = [Runtime._instance]
+        elif last_runtime:
+            return last_runtime[0]
+        return runtime_instance()
+
+    def exists():
+        return Runtime._instance is not None or bool(last_runtime)
+
+    def locked_get_bytecode(script_cache, script_path):
+        with compile_lock:
+            return get_bytecode(script_cache, script_path)
+
+    with (
+        patch_config_options({"global.appTest": True}),
+        unittest.mock.patch.object(Runtime, "instance", instance),
+        unittest.mock.patch.object(Runtime, "exists", exists),
+        unittest.mock.patch.object(ScriptCache, "get_bytecode", locked_get_bytecode),
+    ):
+        yield
+
+
+def rss_mb():
+    """Returns the resident memory of the process, in MB."""
+    with open("/proc/self/status") as status:
+        line = next(line for line in status if line.startswith("VmRSS:"))
+    return int(line.split()[1]) / 1024
+
+
+def synthetic_app_dir(tmp_dir, scale):
+    """
+    Builds a copy of the app in `tmp_dir` that links to the code, images and map files of the
+    current directory and holds a synthetic dataset `scale` times the real size.
+    """
+    root = os.getcwd()
+    for name in ("app.py", "app_modules", "img"):
+        os.symlink(os.path.join(root, name), os.path.join(tmp_dir, name))
+    data_dir = os.path.join(tmp_dir, "data")
+    os.makedirs(data_dir)
+    for name in os.listdir(os.path.join(root, "data")):
+        if name.endswith(".geojson"):
+            os.symlink(os.path.join(root, "data", name), os.path.join(data_dir, name))
+    dataset = make_scaled_dataset(scale, geometry=False)[DATASET_COLUMNS]
+    dataset.to_csv(os.path.join(tmp_dir, CSV_PATH), index=False)
+    return tmp_dir
+
+
+def clickable_regions():
+    """
+    Returns the regions a visitor can click: 'All Regions' and every region of the dataset in the
+    current directory, including those without rows for some energy types.
+    """
+    return ["All Regions"] + wait_for_snapshot().cube.regions.tolist()
+
+
+def rerun_failed(app):
+    """
+    Returns whether the last run of a session failed: it raised, or it did not draw the page,
+    e.g. when the script failed to compile, which leaves no exception element.
+    """
+    return bool(app.exception) or not app.sidebar.slider
+
+
+def selectbox(app, label):
+    """Returns the selectbox of the page whose label contains `label`."""
+    return next(widget for widget in app.selectbox if label in widget.label)
+
+
+def run_action(app, action, rng, regions):
+    """Changes one widget or session state value of the page the way a visitor would."""
+    if action == "date range":
+        slider = app.sidebar.slider[0]
+        # Drawn from the bounds of the slider, not from its current range, so that a session
+        # goes back to wide ranges. Date slider bounds are in microseconds since the epoch.
+        start, end = pd.to_datetime([slider.min, slider.max], unit="us")
+        months = pd.date_range(start, end, freq="MS").to_pydatetime()
+        first, last = sorted(rng.sample(range(len(months)), 2))
+        slider.set_range(months[first], months[last])
+    elif action == "energy type":
+        selectbox(app, "Energy Type").set_value(rng.choice(["All Energy Types"] + ENERGY_TYPES))
+    elif action == "region":
+        app.session_state["region"] = rng.choice(regions)
+    else:
+        time_interval = selectbox(app, "Time Aggregation")
+        time_interval.set_value("Monthly" if time_interval.value == "Yearly" else "Yearly")
+
+
+def run_session(session_id, actions, seed, regions, apps, apps_lock):
+    """
+    Opens a session and runs `actions` random actions in it.
+
+    Returns:
+        list: One (action, milliseconds, failed) tuple per rerun, the first one opening the page.
+    """
+    rng = random.Random(seed * 1_000_003 + session_id)
+    app = AppTest.from_file(os.path.abspath("app.py"), default_timeout=TIMEOUT_SECONDS)
+    with apps_lock:
+        # Kept alive until the end of the run, so their memory is counted.
+        apps.append(app)
+
+    reruns = []
+    action = "open"
+    for step in range(actions + 1):
+        if step > 0:
+            action = rng.choice(ACTIONS)
+            # A failed rerun leaves no widgets to act on; the session reloads the page instead,
+            # back on all regions.
+            if reruns[-1][2]:
+                action = "open"
+                app.session_state["region"] = "All Regions"
+            else:
+                run_action(app, action, rng, regions)
+        start = time.perf_counter()
+        app.run()
+        reruns.append((action, (time.perf_counter() - start) * 1000, rerun_failed(app)))
+    return reruns
+
+
+def run_level(concurrency, actions, seed, regions):
+    """
+    Runs `concurrency` sessions at the same time and summarizes their reruns. Latencies are those
+    of the successful reruns.
+    """
+    apps, apps_lock = [], threading.Lock()
+    gc.collect()
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(run_session, session_id, actions, seed, regions, apps, apps_lock)
+            for session_id in range(concurrency)
+        ]
+        reruns = [rerun for future in futures for rerun in future.result()]
+    wall_seconds = time.perf_counter() - start
+    gc.collect()
+    rss_after = rss_mb()
+    del apps
+
+    succeeded = [(action, milliseconds) for action, milliseconds, failed in reruns if not failed]
+    failed_by_action = {}
+    for action, _, failed in reruns:
+        if failed:
+            failed_by_action[action] = failed_by_action.get(action, 0) + 1
+    latencies = np.array([milliseconds for _, milliseconds in succeeded])
+
+    def percentile(q):
+        return float(np.percentile(latencies, q)) if len(latencies) else None
+
+    by_action = {
+        action: float(np.percentile([ms for name, ms in succeeded if name == action], 95))
+        for action in ["open"] + ACTIONS
+        if any(name == action for name, _ in succeeded)
+    }
+    return {
+        "concurrency": concurrency,
+        "reruns": len(reruns),
+        "failed": len(reruns) - len(succeeded),
+        "failed_by_action": failed_by_action,
+        "wall_s": wall_seconds,
+        "throughput_per_s": len(succeeded) / wall_seconds,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": float(latencies.max()) if len(latencies) else None,
+        "p95_ms_by_action": by_action,
+        "rss_mb": rss_after,
+        "rss_growth_per_session_mb": (rss_after - rss_before) / concurrency,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent session load test of the app.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--actions", type=int, default=20, help="Actions per session.")
+    parser.add_argument("--scale", type=int, help="Run on a synthetic dataset of this scale.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to write the results to.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir, concurrent_app_tests():
+        output = os.path.abspath(args.output) if args.output else None
+        if args.scale:
+            os.chdir(synthetic_app_dir(tmp_dir, args.scale))
+
+        # The first page load pays for loading the dataset and importing the chart libraries,
+        # which every later session of the process reuses.
+        warm_up = run_session(-1, 0, args.seed, [], [], threading.Lock())
+        if warm_up[0][2]:
+            sys.exit("the first page load failed")
+        print(f"first page load {warm_up[0][1]:.0f} ms")
+        regions = clickable_regions()
+        # Widgets and session state are changed from the harness threads, outside a script run.
+        # Streamlit sets its log levels when the first run reads its config.
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(
+            logging.ERROR
+        )
+
+        results = []
+        for concurrency in args.concurrency:
+            result = run_level(concurrency, args.actions, args.seed, regions)
+            results.append(result)
+            if result["failed"] == result["reruns"]:
+                print(f"{concurrency:>3} sessions  all {result['reruns']} reruns failed")
+                continue
+            print(
+                f"{concurrency:>3} sessions  {result['reruns'] - result['failed']:>5} reruns  "
+                f"{result['throughput_per_s']:6.1f} reruns/s  "
+                f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+                f"p99 {result['p99_ms']:7.1f} ms  "
+                f"RSS +{result['rss_growth_per_session_mb']:6.1f} MB/session"
+            )
+            if result["failed"]:
+                print(f"      {result['failed']} failed reruns, by action: {result['failed_by_action']}")
+
+        if output:
+            with open(output, "w", encoding="utf-8") as output_file:
+                json.dump({"scale": args.scale or 1, "results": results}, output_file, indent=2)
+
+    failed = sum(result["failed"] for result in results)
+    if failed:
+        sys.exit(f"{failed} reruns failed; their latencies are left out of the percentiles")
+
+
+if __name__ == "__main__":
+    main()
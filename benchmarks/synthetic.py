@@ -0,0 +1,109 @@
+"""
+Synthetic datasets with the schema written by the preprocessing notebook, used by the benchmarks.
+
+The real extract has one row per (month, region, energy type): 47 months x 12 regions x 4 energy
+types = 2256 rows. Larger datasets are produced by adding months of history and by splitting
+each (month, region, energy type) into several rows, as in installation-level extracts.
+"""
+
+import numpy as np
+import pandas as pd
+
+REGIONS = [
+    "Île-de-France",
+    "Centre-Val de Loire",
+    "Bourgogne-Franche-Comté",
+    "Normandie",
+    "Hauts-de-France",
+    "Grand Est",
+    "Pays de la Loire",
+    "Bretagne",
+    "Nouvelle-Aquitaine",
+    "Occitanie",
+    "Auvergne-Rhône-Alpes",
+    "Provence-Alpes-Côte d'Azur",
+]
+REGION_CODES = ["11", "24", "27", "28", "32", "44", "52", "53", "75", "76", "84", "93"]
+ENERGY_TYPES = ["Onshore Wind", "Hydropower", "Solar", "Geothermal"]
+REAL_MONTHS = 47
+REAL_ROWS = REAL_MONTHS * len(REGIONS) * len(ENERGY_TYPES)
+
+
+def _geometry_string(rng):
+    """Returns a polygon string comparable in size to the 'geom' column of the extract."""
+    points = ",".join(
+        f"[{x:.13f},{y:.13f}]" for x, y in rng.uniform(-5, 10, size=(60, 2))
+    )
+    return '{"type": "Polygon", "coordinates": [[' + points + "]]}"
+
+
+def make_raw_dataset(months=REAL_MONTHS, rows_per_key=1, seed=0, geometry=True):
+    """
+    Builds a dataset shaped like `data/France_Region_Auction_Data.csv`, sorted by date.
+
+    Args:
+        months (int): Number of months of history, starting in March 2019.
+        rows_per_key (int): Number of rows for each (month, region, energy type).
+        seed (int): Seed of the random generator.
+        geometry (bool): Whether to add the 'geom' and 'geo_point_2d' columns. They are stored as
+                         one string per row, several GB at 1000x the real size.
+
+    Returns:
+        pd.DataFrame: The raw dataset, with 'date' as 'YYYY-MM' strings.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.period_range("2019-03", periods=months, freq="M").strftime("%Y-%m")
+    n_keys = len(REGIONS) * len(ENERGY_TYPES)
+    n_rows = months * n_keys * rows_per_key
+
+    key = np.tile(np.repeat(np.arange(n_keys), rows_per_key), months)
+    region_idx = key // len(ENERGY_TYPES)
+    energy_idx = key % len(ENERGY_TYPES)
+    geometries = np.array([_geometry_string(rng) for _ in REGIONS], dtype=object)
+    geo_points = np.array(
+        [f"{y:.13f}, {x:.13f}" for x, y in rng.uniform(-5, 10, size=(len(REGIONS), 2))],
+        dtype=object,
+    )
+    volume_sold = rng.integers(0, 200_000, size=n_rows).astype("float64")
+
+    columns = {
+        "region": np.array(REGIONS, dtype=object)[region_idx],
+        "code_region": np.array(REGION_CODES, dtype=object)[region_idx],
+        "energy_type": np.array(ENERGY_TYPES, dtype=object)[energy_idx],
+        "total_volume_auctionned": volume_sold + rng.integers(0, 10_000, size=n_rows),
+        "total_volume_sold": volume_sold,
+        "date": np.repeat(np.asarray(dates, dtype=object), n_keys * rows_per_key),
+    }
+    if geometry:
+        columns["geom"] = geometries[region_idx]
+        columns["geo_point_2d"] = geo_points[region_idx]
+    return pd.DataFrame(columns)
+
+
+def make_scaled_dataset(scale, seed=0, geometry=True):
+    """
+    Builds a raw dataset `scale` times the size of the real extract.
+
+    Up to 10x the history is extended (about 40 years of months); beyond that each
+    (month, region, energy type) is split into several rows.
+    """
+    months_factor = min(scale, 10)
+    return make_raw_dataset(
+        months=REAL_MONTHS * months_factor,
+        rows_per_key=max(1, scale // months_factor),
+        seed=seed,
+        geometry=geometry,
+    )
+
+
+def to_raw_extract(dataset):
+    """
+    Converts a raw dataset into the layout of the source extract read by `preprocess_data.ingest`:
+    French column names and energy types, to be written with ';' as separator.
+    """
+    from preprocess_data.ingest import COLUMN_MAPPING, ENERGY_TYPE_TRANSLATION
+
+    french_names = {english: french for french, english in ENERGY_TYPE_TRANSLATION.items()}
+    extract = dataset.rename(columns={new: old for old, new in COLUMN_MAPPING.items()})
+    extract["technologie_technology"] = extract["technologie_technology"].map(french_names)
+    return extract
@@ -0,0 +1,454 @@
+"""
+Ingests the raw regional auction extract into the dataset read by the dashboard.
+
+This replaces the steps of `preprocess_translate_data.ipynb`. The raw semicolon separated CSV is
+streamed in chunks. Its columns are renamed, energy types translated into English and geometry
+columns dropped, and only the months newer than the last stored one are appended to
+`data/France_Region_Auction_Data.csv`. Installation-level extracts can be summed to the
+(date, region, energy type) grain chunk by chunk, so memory stays bounded by the chunk size. The
+columnar copy is updated along with the CSV when present:
+
+    python -m preprocess_data.ingest --input archive_France_Region_Auction_Data.csv
+"""
+
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app_modules.dataset import (
+    COLUMNAR_PATH,
+    CSV_PATH,
+    build_columnar_dataset,
+    columnar_dataset_is_current,
+    compact_dataset,
+    read_columnar_dataset,
+)
+
+RAW_CSV_PATH = "preprocess_data/archive_France_Region_Auction_Data.csv"
+RAW_SEPARATOR = ";"
+CHUNK_SIZE = 100_000
+# Size of the byte ranges aggregated independently, and in parallel with several workers.
+PARTITION_BYTES = 64 * 2**20
+
+COLUMN_MAPPING = {
+    "region_region": "region",
+    "technologie_technology": "energy_type",
+}
+ENERGY_TYPE_TRANSLATION = {
+    "Éolien terrestre": "Onshore Wind",
+    "Hydraulique": "Hydropower",
+    "Solaire": "Solar",
+    "Géothermie": "Geothermal",
+}
+GEOMETRY_COLUMNS = ["geom", "geo_point_2d"]
+
+# Columns of the stored dataset, in order.
+INGESTED_COLUMNS = [
+    "region",
+    "code_region",
+    "energy_type",
+    "total_volume_auctionned",
+    "total_volume_sold",
+    "date",
+]
+
+# Grain of the dashboard, with the region code that goes along with the region, and the columns
+# summed when installation-level extracts are aggregated to it.
+AGGREGATE_KEYS = ["date", "region", "code_region", "energy_type"]
+VOLUME_COLUMNS = ["total_volume_auctionned", "total_volume_sold"]
+
+
+def read_raw_chunks(raw_path, chunk_size=CHUNK_SIZE):
+    """
+    Streams the raw extract without its geometry columns, which are never parsed.
+
+    Args:
+        raw_path (str or file): Path of the raw semicolon separated CSV, or a binary file
+                                starting with its header.
+        chunk_size (int): Number of rows per chunk.
+
+    Returns:
+        Iterator[pd.DataFrame]: The raw chunks.
+    """
+    return pd.read_csv(
+        raw_path,
+        sep=RAW_SEPARATOR,
+        usecols=lambda column: column not in GEOMETRY_COLUMNS,
+        dtype={"code_region": str, "date": str},
+        chunksize=chunk_size,
+    )
+
+
+def translate_chunk(chunk):
+    """
+    Renames the columns of a raw chunk and translates its energy types.
+
+    Returns:
+        pd.DataFrame: The chunk with the INGESTED_COLUMNS.
+    """
+    chunk = chunk.rename(columns=COLUMN_MAPPING)
+    chunk["energy_type"] = chunk["energy_type"].replace(ENERGY_TYPE_TRANSLATION)
+    return chunk[INGESTED_COLUMNS]
+
+
+def parse_months(dates):
+    """Parses 'YYYY-MM' date strings into datetimes."""
+    return pd.to_datetime(dates, format="%Y-%m")
+
+
+def stored_columns(csv_path=CSV_PATH):
+    """Returns the header of the stored dataset, or None when it does not exist."""
+    if not os.path.exists(csv_path):
+        return None
+    return list(pd.read_csv(csv_path, nrows=0).columns)
+
+
+def latest_stored_month(csv_path=CSV_PATH):
+    """Returns the last month of the stored dataset, or None when it holds no rows."""
+    dates = pd.read_csv(csv_path, usecols=["date"], dtype={"date": str})["date"]
+    if dates.empty:
+        return None
+    return parse_months(dates).max()
+
+
+def iter_new_chunks(raw_path, latest_month=None, chunk_size=CHUNK_SIZE):
+    """
+    Streams the translated rows of the raw extract that are newer than `latest_month`.
+
+    Args:
+        raw_path (str or file): Path of the raw semicolon separated CSV, or a binary file
+                                starting with its header.
+        latest_month (pd.Timestamp): Last month already stored, or None to keep every row.
+        chunk_size (int): Number of rows per chunk.
+
+    Returns:
+        Iterator[pd.DataFrame]: The non-empty translated chunks, in file order.
+    """
+    for chunk in read_raw_chunks(raw_path, chunk_size):
+        if latest_month is not None:
+            chunk = chunk[parse_months(chunk["date"]) > latest_month]
+        if not chunk.empty:
+            yield translate_chunk(chunk)
+
+
+def aggregate_chunk(chunk):
+    """
+    Sums the volumes of a chunk per (date, region, energy type). Rows missing a key are summed
+    under their missing key rather than dropped, as the rows of an extract that is not
+    aggregated are kept; `ingest` reports them.
+
+    Returns:
+        pd.DataFrame: The VOLUME_COLUMNS indexed by the AGGREGATE_KEYS.
+    """
+    return chunk.groupby(AGGREGATE_KEYS, sort=False, dropna=False)[VOLUME_COLUMNS].sum()
+
+
+def merge_aggregates(total, partial):
+    """
+    Adds a partial aggregate to the running one. Keys missing from either side count as zero.
+
+    Args:
+        total (pd.DataFrame): The running aggregate, or None before the first chunk.
+        partial (pd.DataFrame): The aggregate of the next chunk.
+
+    Returns:
+        pd.DataFrame: The merged aggregate, with one row per key seen so far.
+    """
+    if total is None:
+        return partial
+    merged = total.add(partial, fill_value=0)
+    # Aligning keys missing from one side goes through floats; integer volumes stay integers.
+    return merged.astype(
+        {
+            column: np.result_type(total[column].dtype, partial[column].dtype)
+            for column in merged.columns
+        }
+    )
+
+
+def aggregated_rows(aggregate):
+    """
+    Turns an aggregate into dataset rows.
+
+    Returns:
+        pd.DataFrame: One row per (date, region, energy type) with the INGESTED_COLUMNS, sorted
+                      by date, region and energy type.
+    """
+    if aggregate is None:
+        return pd.DataFrame(columns=INGESTED_COLUMNS)
+    rows = aggregate.reset_index().sort_values(
+        ["date", "region", "energy_type"], kind="stable", ignore_index=True
+    )
+    return rows[INGESTED_COLUMNS]
+
+
+class PartitionReader(io.RawIOBase):
+    """A binary file reading the header line of the extract followed by one byte range of it."""
+
+    def __init__(self, raw_path, header, start, stop):
+        self._file = open(raw_path, "rb")
+        self._file.seek(start)
+        self._header = header
+        self._remaining = stop - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._header:
+            size = min(len(buffer), len(self._header))
+            buffer[:size] = self._header[:size]
+            self._header = self._header[size:]
+            return size
+        size = min(len(buffer), self._remaining)
+        data = self._file.read(size)
+        buffer[: len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def partition_extract(raw_path, partition_bytes=PARTITION_BYTES):
+    """
+    Splits the rows of the extract into byte ranges starting and ending on line boundaries.
+
+    The ranges depend only on the file and `partition_bytes`, never on the number of workers, so
+    every run reduces the same partial sums in the same order. For an extract ordered by date,
+    as the source extracts are, each range covers a run of consecutive months.
+
+    Returns:
+        tuple: The header line, as bytes, and the list of (start, stop) byte offsets.
+    """
+    size = os.path.getsize(raw_path)
+    with open(raw_path, "rb") as raw_file:
+        header = raw_file.readline()
+        bounds = [raw_file.tell()]
+        for offset in range(bounds[0] + partition_bytes, size, partition_bytes):
+            raw_file.seek(offset)
+            raw_file.readline()
+            bounds.append(min(max(raw_file.tell(), bounds[-1]), size))
+        bounds.append(size)
+    ranges = [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+    return header, ranges
+
+
+def aggregate_partition(raw_path, header, start, stop, latest_month=None, chunk_size=CHUNK_SIZE):
+    """
+    Aggregates one byte range of the extract, chunk by chunk.
+
+    Returns:
+        pd.DataFrame: The VOLUME_COLUMNS indexed by the AGGREGATE_KEYS, or None when the range
+                      holds no new rows.
+    """
+    total = None
+    with io.BufferedReader(PartitionReader(raw_path, header, start, stop)) as partition:
+        for chunk in iter_new_chunks(partition, latest_month, chunk_size):
+            total = merge_aggregates(total, aggregate_chunk(chunk))
+    return total
+
+
+def aggregate_extract(
+    raw_path,
+    latest_month=None,
+    chunk_size=CHUNK_SIZE,
+    workers=1,
+    partition_bytes=PARTITION_BYTES,
+):
+    """
+    Aggregates the new rows of the extract to the (date, region, energy type) grain.
+
+    The extract is split with `partition_extract`. The partitions are aggregated in this process
+    with one worker, or by a process pool otherwise. Their partial sums are then merged in
+    partition order, so the result is bit-identical whatever the number of workers.
+
+    Args:
+        raw_path (str): Path of the raw semicolon separated CSV.
+        latest_month (pd.Timestamp): Last month already stored, or None to keep every row.
+        chunk_size (int): Number of rows parsed at a time by each worker.
+        workers (int): Number of worker processes.
+        partition_bytes (int): Approximate size of a partition.
+
+    Returns:
+        pd.DataFrame: The aggregated rows, as returned by `aggregated_rows`.
+    """
+    header, ranges = partition_extract(raw_path, partition_bytes)
+    arguments = [
+        (raw_path, header, start, stop, latest_month, chunk_size) for start, stop in ranges
+    ]
+    if workers == 1:
+        partials = [aggregate_partition(*partition) for partition in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(aggregate_partition, *zip(*arguments)))
+
+    total = None
+    for partial in partials:
+        if partial is not None:
+            total = merge_aggregates(total, partial)
+    return aggregated_rows(total)
+
+
+def read_new_rows(
+    raw_path, latest_month=None, chunk_size=CHUNK_SIZE, aggregate=False, workers=1
+):
+    """
+    Collects the translated rows of the raw extract that are newer than `latest_month`.
+
+    With `aggregate`, the rows are summed to the (date, region, energy type) grain of the
+    dashboard by `aggregate_extract`. Memory then depends on the chunk size, the number of
+    workers and the number of keys, not on the size of the extract.
+
+    Args:
+        raw_path (str): Path of the raw semicolon separated CSV.
+        latest_month (pd.Timestamp): Last month already stored, or None to keep every row.
+        chunk_size (int): Number of rows per chunk.
+        aggregate (bool): Whether to aggregate installation-level rows.
+        workers (int): Number of worker processes aggregating the extract.
+
+    Returns:
+        pd.DataFrame: The new rows with the INGESTED_COLUMNS, sorted by date.
+    """
+    if aggregate:
+        return aggregate_extract(raw_path, latest_month, chunk_size, workers)
+
+    new_chunks = list(iter_new_chunks(raw_path, latest_month, chunk_size))
+    if not new_chunks:
+        return pd.DataFrame(columns=INGESTED_COLUMNS)
+    new_rows = pd.concat(new_chunks, ignore_index=True)
+    return new_rows.sort_values("date", kind="stable", ignore_index=True)
+
+
+def count_missing_keys(rows):
+    """Returns the number of rows missing their date, region, region code or energy type."""
+    return int(rows[AGGREGATE_KEYS].isna().any(axis=1).sum())
+
+
+def update_columnar_dataset(new_rows, was_current, csv_path=CSV_PATH, columnar_path=COLUMNAR_PATH):
+    """
+    Keeps an existing columnar copy in step with the CSV. A copy that was current before the
+    ingestion gets the new rows appended; any other copy is rebuilt from the CSV.
+
+    Returns:
+        bool: Whether the columnar copy was written.
+    """
+    if not os.path.exists(columnar_path):
+        return False
+    if was_current:
+        dataset = pd.concat([read_columnar_dataset(columnar_path), compact_dataset(new_rows)])
+        compact_dataset(dataset).to_parquet(columnar_path, index=False)
+    else:
+        build_columnar_dataset(csv_path, columnar_path)
+    return True
+
+
+def ingest(
+    raw_path,
+    csv_path=CSV_PATH,
+    columnar_path=COLUMNAR_PATH,
+    chunk_size=CHUNK_SIZE,
+    full=False,
+    aggregate=False,
+    workers=1,
+):
+    """
+    Appends the months of the raw extract that are newer than the stored dataset.
+
+    The stored dataset is rewritten from scratch when `full` is set, when it does not exist yet
+    or when its columns differ from INGESTED_COLUMNS, e.g. a file written by the notebook with
+    its geometry columns.
+
+    Args:
+        raw_path (str): Path of the raw semicolon separated CSV.
+        csv_path (str): Path of the dataset read by the dashboard.
+        columnar_path (str): Path of its columnar copy, updated when it exists.
+        chunk_size (int): Number of raw rows parsed at a time, which bounds peak memory.
+        full (bool): Whether to reprocess the full history.
+        aggregate (bool): Whether to aggregate installation-level rows to one row per
+                          (date, region, energy type).
+        workers (int): Number of worker processes aggregating the extract.
+
+    Returns:
+        dict: The number of rows written, the new months, the number of written rows missing a
+              key, whether the ingestion was incremental and whether the columnar copy was
+              updated.
+    """
+    incremental = not full and stored_columns(csv_path) == INGESTED_COLUMNS
+    latest_month = latest_stored_month(csv_path) if incremental else None
+    columnar_was_current = incremental and columnar_dataset_is_current(csv_path, columnar_path)
+
+    new_rows = read_new_rows(raw_path, latest_month, chunk_size, aggregate, workers)
+    summary = {
+        "rows": len(new_rows),
+        "months": sorted(new_rows["date"].dropna().unique()),
+        "missing_keys": count_missing_keys(new_rows),
+        "incremental": incremental,
+        "columnar_updated": False,
+    }
+    if incremental and new_rows.empty:
+        return summary
+
+    if incremental:
+        new_rows.to_csv(csv_path, mode="a", header=False, index=False)
+    else:
+        new_rows.to_csv(csv_path, index=False)
+    summary["columnar_updated"] = update_columnar_dataset(
+        new_rows, columnar_was_current, csv_path, columnar_path
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest the raw regional auction extract.")
+    parser.add_argument("--input", default=RAW_CSV_PATH, help="Raw semicolon separated CSV.")
+    parser.add_argument("--output", default=CSV_PATH, help="Dataset read by the dashboard.")
+    parser.add_argument("--columnar", default=COLUMNAR_PATH, help="Columnar copy to update.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--full", action="store_true", help="Reprocess the full history.")
+    parser.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="Sum installation-level rows per (date, region, energy type).",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Worker processes used by --aggregate."
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = ingest(
+        args.input,
+        args.output,
+        args.columnar,
+        args.chunk_size,
+        args.full,
+        args.aggregate,
+        args.workers,
+    )
+    elapsed = time.perf_counter() - start
+
+    mode = "Appended" if summary["incremental"] else "Wrote"
+    months = summary["months"]
+    month_range = f" ({months[0]} to {months[-1]})" if months else ""
+    print(
+        f"{mode} {summary['rows']} rows over {len(months)} months{month_range} to "
+        f"{args.output} in {elapsed:.2f} s"
+    )
+    if summary["missing_keys"]:
+        print(
+            f"Warning: {summary['missing_keys']} rows miss their date, region, region code or "
+            "energy type"
+        )
+    if summary["columnar_updated"]:
+        print(f"Updated {args.columnar}")
+
+
+if __name__ == "__main__":
+    main()
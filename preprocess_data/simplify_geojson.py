@@ -0,0 +1,230 @@
+"""
+Writes simplified copies of the regions GeoJSON for the zoom levels the map is shown at.
+
+Borders are simplified once per shared arc, so neighbouring regions keep identical borders
+without gaps or overlaps. Coordinates are then rounded to a precision fitting the zoom level.
+The byte size and the folium render time of each level are reported:
+
+    python -m preprocess_data.simplify_geojson
+"""
+
+import argparse
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+
+from app_modules.map import GEOJSON_PATH, GEOMETRY_LEVELS, geometry_level_path
+
+
+def polygon_rings(geometry):
+    """Returns the rings of a Polygon or MultiPolygon geometry as lists of coordinate tuples."""
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+    return [[tuple(point) for point in ring] for polygon in polygons for ring in polygon]
+
+
+def find_junctions(rings):
+    """
+    Finds the vertices where borders meet, i.e. vertices connected to other than two vertices.
+    Arcs between junctions are shared as a whole by the same regions.
+    """
+    neighbours = {}
+    for ring in rings:
+        for a, b in zip(ring, ring[1:]):
+            neighbours.setdefault(a, set()).add(b)
+            neighbours.setdefault(b, set()).add(a)
+    return {point for point, linked in neighbours.items() if len(linked) != 2}
+
+
+def split_ring(ring, junctions):
+    """
+    Splits a closed ring into arcs running from junction to junction.
+
+    Returns:
+        list: The arcs, whose concatenation (without repeated endpoints) is the ring. A ring
+              without junctions is returned as a single closed arc.
+    """
+    points = ring[:-1]
+    cuts = [i for i, point in enumerate(points) if point in junctions]
+    if not cuts:
+        return [ring]
+    rotated = points[cuts[0]:] + points[: cuts[0]] + [points[cuts[0]]]
+    cuts = [cut - cuts[0] for cut in cuts] + [len(points)]
+    return [rotated[start : stop + 1] for start, stop in zip(cuts, cuts[1:])]
+
+
+def canonical_arc(arc):
+    """
+    Orients an arc the same way whichever ring it is read from.
+
+    Returns:
+        tuple: The canonical arc and whether it is reversed compared to `arc`.
+    """
+    if arc[0] == arc[-1]:
+        # A closed arc has no junction to start from: start at its smallest vertex.
+        points = arc[:-1]
+        start = points.index(min(points))
+        forward = points[start:] + points[:start]
+        backward = [forward[0]] + forward[:0:-1]
+        if backward < forward:
+            return tuple(backward + [backward[0]]), True
+        return tuple(forward + [forward[0]]), False
+    reversed_arc = arc[::-1]
+    if reversed_arc < arc:
+        return tuple(reversed_arc), True
+    return tuple(arc), False
+
+
+def douglas_peucker(points, tolerance):
+    """
+    Simplifies a polyline, keeping its endpoints.
+
+    Args:
+        points (np.ndarray): The (n, 2) vertices of the polyline.
+        tolerance (float): The maximum distance between the polyline and its simplification.
+
+    Returns:
+        np.ndarray: The sorted indices of the vertices to keep.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, stop = stack.pop()
+        if stop - start < 2:
+            continue
+        segment = points[stop] - points[start]
+        offsets = points[start + 1 : stop] - points[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack += [(start, split), (split, stop)]
+    return np.flatnonzero(keep)
+
+
+def simplify_arc(arc, tolerance, precision):
+    """
+    Simplifies and rounds an arc. Open arcs keep at least one interior vertex and closed arcs at
+    least three, so that rings cannot collapse.
+    """
+    points = np.asarray(arc, dtype=float)
+    kept = douglas_peucker(points, tolerance)
+    minimum = min(len(points), 4 if arc[0] == arc[-1] else 3)
+    if len(kept) < minimum:
+        kept = np.unique(np.linspace(0, len(points) - 1, minimum).round().astype(int))
+
+    simplified = []
+    for x, y in np.round(points[kept], precision).tolist():
+        # Rounding can merge consecutive vertices.
+        if not simplified or simplified[-1] != (x, y):
+            simplified.append((x, y))
+    return simplified
+
+
+def simplify_geojson(geojson, tolerance, precision):
+    """
+    Simplifies every region of a GeoJSON, preserving the borders shared between regions.
+
+    Args:
+        geojson (dict): The regions FeatureCollection.
+        tolerance (float): The simplification tolerance, in degrees.
+        precision (int): The number of decimals kept in the coordinates.
+
+    Returns:
+        dict: A new FeatureCollection with the same features and properties.
+    """
+    all_rings = [
+        ring for feature in geojson["features"] for ring in polygon_rings(feature["geometry"])
+    ]
+    junctions = find_junctions(all_rings)
+    simplified_arcs = {}
+
+    def simplify_ring(ring):
+        simplified_ring = []
+        for arc in split_ring(ring, junctions):
+            key, reversed_arc = canonical_arc(arc)
+            if key not in simplified_arcs:
+                simplified_arcs[key] = simplify_arc(key, tolerance, precision)
+            simplified = simplified_arcs[key]
+            if reversed_arc:
+                simplified = simplified[::-1]
+            simplified_ring += simplified if not simplified_ring else simplified[1:]
+        if simplified_ring[0] != simplified_ring[-1]:
+            simplified_ring.append(simplified_ring[0])
+        return [list(point) for point in simplified_ring]
+
+    features = []
+    for feature in geojson["features"]:
+        geometry = feature["geometry"]
+        is_polygon = geometry["type"] == "Polygon"
+        polygons = [geometry["coordinates"]] if is_polygon else geometry["coordinates"]
+        coordinates = [
+            [simplify_ring([tuple(point) for point in ring]) for ring in polygon]
+            for polygon in polygons
+        ]
+        # Islets and holes smaller than the precision collapse when rounded: drop them, along
+        # with polygons whose outer ring collapsed, but keep each region's largest polygon.
+        largest = max(range(len(coordinates)), key=lambda i: len(coordinates[i][0]))
+        coordinates = [
+            [ring for ring in polygon if len(ring) >= 4]
+            for i, polygon in enumerate(coordinates)
+            if i == largest or len(polygon[0]) >= 4
+        ]
+        if is_polygon:
+            coordinates = coordinates[0]
+        features.append(
+            {**feature, "geometry": {"type": geometry["type"], "coordinates": coordinates}}
+        )
+    return {**geojson, "features": features}
+
+
+def measure_render_time(geojson, repeat=5):
+    """Returns the fastest time, in milliseconds, to render the map HTML with a GeoJSON layer."""
+    import folium
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        folium_map = folium.Map(location=[46.603354, 3], zoom_start=5, tiles=None)
+        folium.GeoJson(geojson).add_to(folium_map)
+        folium_map.get_root().render()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simplify the regions GeoJSON per zoom level.")
+    parser.add_argument("--input", default=GEOJSON_PATH, help="Full resolution GeoJSON.")
+    args = parser.parse_args()
+
+    with open(args.input, encoding="utf-8") as geojson_file:
+        geojson = json.load(geojson_file)
+
+    warnings.simplefilter("ignore")
+    print(f"{'level':<8} {'bytes':>9} {'render ms':>10}")
+    print(f"{'full':<8} {os.path.getsize(args.input):>9} {measure_render_time(geojson):>10.1f}")
+    for level, settings in GEOMETRY_LEVELS.items():
+        simplified = simplify_geojson(geojson, settings["tolerance"], settings["precision"])
+        path = geometry_level_path(level)
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump(simplified, output, ensure_ascii=False, separators=(",", ":"))
+        print(
+            f"{level:<8} {os.path.getsize(path):>9} {measure_render_time(simplified):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
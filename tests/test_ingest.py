@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_ingest_memory import run_ingestion, write_extract
+from benchmarks.synthetic import REAL_MONTHS, make_raw_dataset, to_raw_extract
+from preprocess_data.ingest import (
+    AGGREGATE_KEYS,
+    INGESTED_COLUMNS,
+    VOLUME_COLUMNS,
+    aggregate_extract,
+    ingest,
+    partition_extract,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# With chunks this small, the extracts of both scales span many chunks, so the peak is reached
+# on the smaller one already.
+CHUNK_SIZE = 1_000
+# The 10x extract is about 43 MB larger than the 1x one; the chunked aggregation grows by a few
+# MB, reading it whole by over 100 MB.
+MAX_RSS_GROWTH_MB = 20
+# Small enough for the extract of the parity test to span several partitions.
+PARTITION_BYTES = 64 * 2**10
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    """The ingestion runs in interpreters started from the repository root."""
+    monkeypatch.chdir(ROOT)
+
+
+def test_chunked_aggregation_peak_rss_stays_flat_as_the_extract_grows(tmp_path):
+    peak_rss_mb = {}
+    for scale in (1, 10):
+        raw_path = str(tmp_path / f"extract_{scale}.csv")
+        write_extract(raw_path, scale)
+        run = run_ingestion(raw_path, str(tmp_path), "chunked", CHUNK_SIZE)
+        peak_rss_mb[scale] = run["ingest_rss_mb"]
+        os.remove(raw_path)
+
+    assert peak_rss_mb[10] - peak_rss_mb[1] < MAX_RSS_GROWTH_MB, peak_rss_mb
+
+
+def test_aggregation_keeps_and_reports_rows_missing_a_key(tmp_path):
+    raw_path = str(tmp_path / "extract.csv")
+    csv_path = str(tmp_path / "dataset.csv")
+    raw = pd.DataFrame(
+        {
+            "region_region": ["Bretagne", "Bretagne", np.nan, np.nan],
+            "code_region": ["53", "53", np.nan, np.nan],
+            "technologie_technology": ["Solaire"] * 4,
+            "total_volume_auctionned": [10, 20, 30, 40],
+            "total_volume_sold": [1, 2, 3, 4],
+            "date": ["2021-01"] * 4,
+        }
+    )
+    raw.to_csv(raw_path, sep=";", index=False)
+
+    rows = aggregate_extract(raw_path, chunk_size=2)
+    summary = ingest(raw_path, csv_path, str(tmp_path / "dataset.parquet"), aggregate=True)
+
+    assert list(rows.columns) == INGESTED_COLUMNS
+    assert rows["total_volume_sold"].tolist() == [3, 7]
+    assert rows["region"].isna().tolist() == [False, True]
+    assert summary["rows"] == 2
+    assert summary["missing_keys"] == 1
+    assert pd.read_csv(csv_path)[AGGREGATE_KEYS].isna().any(axis=1).sum() == 1
+
+
+@pytest.mark.parametrize("integer_volumes", [False, True])
+def test_every_worker_count_gives_bit_identical_aggregates(tmp_path, integer_volumes):
+    raw_path = str(tmp_path / "extract.csv")
+    dataset = make_raw_dataset(REAL_MONTHS, rows_per_key=3, geometry=False)
+    for column in VOLUME_COLUMNS:
+        # Fractional volumes make the order of the float additions show in the sums.
+        volumes = dataset[column]
+        dataset[column] = volumes.astype("int64") if integer_volumes else volumes / 7
+    to_raw_extract(dataset).to_csv(raw_path, sep=";", index=False)
+    assert len(partition_extract(raw_path, PARTITION_BYTES)[1]) > 4
+
+    reference = aggregate_extract(raw_path, chunk_size=500, partition_bytes=PARTITION_BYTES)
+    for workers in (2, 4):
+        rows = aggregate_extract(
+            raw_path, chunk_size=500, workers=workers, partition_bytes=PARTITION_BYTES
+        )
+        pd.testing.assert_frame_equal(rows, reference, check_exact=True)
+
+    expected_kind = "i" if integer_volumes else "f"
+    assert [reference[column].dtype.kind for column in VOLUME_COLUMNS] == [expected_kind] * 2
@@ -0,0 +1,72 @@
+import datetime
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app_modules.map import (
+    GEOJSON_PATH,
+    attach_tooltip,
+    create_choropleth,
+    initialize_map,
+    load_region_geometries,
+    update_tooltip,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Outside `streamlit run`, every cached call warns about the missing script context.
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(
+    logging.ERROR
+)
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    """The map reads `data/france_regions.geojson` relative to the repository root."""
+    monkeypatch.chdir(ROOT)
+
+
+def render_map(regions_df, energy_type):
+    """Builds the map of `display_map` without Streamlit and renders its HTML."""
+    map = initialize_map()
+    column = f"{energy_type}_total_volume"
+    choropleth = create_choropleth(regions_df, column, energy_type)
+    choropleth.geojson.add_to(map)
+    update_tooltip(
+        choropleth,
+        regions_df,
+        energy_type,
+        datetime.datetime(2021, 1, 1),
+        datetime.datetime(2021, 12, 1),
+        column,
+        f"{energy_type}_percentage",
+        ("test", energy_type),
+    )
+    attach_tooltip(choropleth, energy_type)
+    return choropleth, map.get_root().render()
+
+
+def test_specific_energy_map_renders_when_first_region_has_no_data():
+    features = load_region_geometries(GEOJSON_PATH)["features"]
+    first_region = features[0]["properties"]["nom"]
+    regions = [feature["properties"]["nom"] for feature in features[:3]]
+    regions_df = pd.DataFrame(
+        {
+            "region": regions,
+            # The first feature has rows for other energy types but none for Geothermal.
+            "Geothermal_total_volume": [np.nan, 1200.0, 300.0],
+            "Geothermal_percentage": [np.nan, 12.0, 3.0],
+        }
+    )
+
+    choropleth, html = render_map(regions_df, "Geothermal")
+
+    properties = choropleth.geojson.data["features"][0]["properties"]
+    assert properties["nom"] == first_region
+    assert properties["total_volume"] == "Total: No data"
+    assert properties["percentage"] == "Geothermal: No data"
+    assert properties["period"] == "From 2021-01 to 2021-12"
+    assert "Geothermal: No data" in html
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from app_modules.dataset import compact_dataset
+from app_modules.filter import compute_regional_energy_statistics
+from benchmarks.bench_regional_statistics import previous_compute_regional_energy_statistics
+from benchmarks.synthetic import make_scaled_dataset
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return compact_dataset(make_scaled_dataset(1))
+
+
+def assert_parity(dataset):
+    """
+    Compares both implementations. Volumes must match exactly; percentages must match the
+    per-energy-type output wherever every region has rows for the type (its positional division
+    is only correct then) and the region-aligned ratio everywhere.
+    """
+    expected = previous_compute_regional_energy_statistics(dataset)
+    actual = compute_regional_energy_statistics(dataset)
+    assert list(actual.columns) == list(expected.columns)
+    assert list(actual["region"].astype(str)) == list(expected["region"].astype(str))
+
+    for column in expected.columns[1:]:
+        actual_values = actual[column].to_numpy(dtype="float64")
+        expected_values = expected[column].to_numpy(dtype="float64")
+        if column.endswith("_percentage"):
+            volume = actual[column.replace("_percentage", "_total_volume")].to_numpy()
+            aligned = volume / actual["total_volume"].to_numpy() * 100
+            assert np.allclose(actual_values, aligned, equal_nan=True), column
+            if not np.isnan(volume).any():
+                assert np.allclose(actual_values, expected_values, equal_nan=True), column
+        else:
+            assert np.array_equal(actual_values, expected_values, equal_nan=True), column
+
+
+def test_regional_statistics_match_the_per_energy_type_implementation(dataset):
+    assert_parity(dataset)
+
+
+def test_regional_statistics_align_percentages_of_a_region_without_rows_for_a_type(dataset):
+    sparse = dataset[
+        ~((dataset["region"] == "Bretagne") & (dataset["energy_type"] == "Geothermal"))
+    ]
+    assert_parity(sparse)
+
+    regions_df = compute_regional_energy_statistics(sparse)
+    bretagne = regions_df[regions_df["region"] == "Bretagne"].iloc[0]
+    assert np.isnan(bretagne["Geothermal_total_volume"])
+    assert np.isnan(bretagne["Geothermal_percentage"])
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from app_modules.cube import build_aggregate_cube
+from app_modules.dataset import DATASET_COLUMNS, add_derived_columns, compact_dataset
+from app_modules.shared_store import open_shared_store, remove_other_versions, write_shared_store
+from benchmarks.synthetic import make_scaled_dataset
+
+
+@pytest.fixture(scope="module")
+def dataset_and_cube():
+    dataset = add_derived_columns(
+        compact_dataset(make_scaled_dataset(1, geometry=False)[DATASET_COLUMNS])
+    )
+    return dataset, build_aggregate_cube(dataset)
+
+
+def write_version(dataset_and_cube, version, store_dir, mtime):
+    """Writes a version and dates it `mtime`, so the order of the writes does not rest on timing."""
+    path = write_shared_store(*dataset_and_cube, version, store_dir)
+    os.utime(path, (mtime, mtime))
+
+
+def test_swap_keeps_the_previous_version_until_the_next_swap(tmp_path, dataset_and_cube):
+    store_dir = str(tmp_path)
+    write_version(dataset_and_cube, "v1", store_dir, 1_000)
+    write_version(dataset_and_cube, "v2", store_dir, 2_000)
+    remove_other_versions("v2", store_dir)
+
+    # A process that read the manifest of v1 before the swap can still open it.
+    assert sorted(os.listdir(store_dir)) == ["v1", "v2"]
+    dataset, _ = open_shared_store("v1", store_dir)
+    assert len(dataset) == len(dataset_and_cube[0])
+
+    write_version(dataset_and_cube, "v3", store_dir, 3_000)
+    remove_other_versions("v3", store_dir)
+    assert sorted(os.listdir(store_dir)) == ["v2", "v3"]
+
+
+def test_stale_temporary_directories_are_removed(tmp_path):
+    store_dir = str(tmp_path)
+    for name, mtime in [(".v2-dead", 1_000), (".v3-writing", None)]:
+        os.makedirs(os.path.join(store_dir, name))
+        if mtime is not None:
+            os.utime(os.path.join(store_dir, name), (mtime, mtime))
+    remove_other_versions("v1", store_dir)
+    assert os.listdir(store_dir) == [".v3-writing"]